@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from users.models import AcademicRecord, EducationInfo
+from .analytics import skill_gaps, top_skills_by_shard
+from .models import SkillDemand, Vacancy
+from .shards import shards_for_specialization
+
+# Окно спроса в отчете о пробелах (недель)
+GAPS_DEFAULT_WEEKS = 4
+GAPS_MAX_WEEKS = 52
+
+
+@admin.register(Vacancy)
+class VacancyAdmin(admin.ModelAdmin):
+    list_display = ('hh_id', 'title', 'company', 'city', 'shard', 'salary', 'published_at', 'is_archived')
+    search_fields = ('hh_id', 'title', 'company')
+    list_filter = ('is_archived', 'shard', 'employment_id', 'experience_id', 'currency')
+    readonly_fields = ('fingerprint', 'etag', 'last_modified', 'detail_fetched_at', 'last_seen_at', 'created_at', 'updated_at')
+    ordering = ('-published_at',)
+
+
+@admin.register(SkillDemand)
+class SkillDemandAdmin(admin.ModelAdmin):
+    list_display = ('name', 'skill', 'shard', 'city', 'week', 'count')
+    search_fields = ('skill', 'name')
+    list_filter = ('shard', 'city')
+    date_hierarchy = 'week'
+    readonly_fields = ('updated_at',)
+
+    def get_urls(self):
+        urls = [
+            path('gaps/', self.admin_site.admin_view(self.gaps_view), name='core_skilldemand_gaps'),
+        ]
+        return urls + super().get_urls()
+
+    def gaps_view(self, request):
+        """
+        Пробелы в навыках по учебным группам: востребованные навыки шарда специальности,
+        не встречающиеся в названиях предметов группы
+        """
+        try:
+            weeks = int(request.GET.get('weeks') or GAPS_DEFAULT_WEEKS)
+        except ValueError:
+            weeks = GAPS_DEFAULT_WEEKS
+        weeks = min(max(weeks, 1), GAPS_MAX_WEEKS)
+
+        specializations = {}
+        for group_name, specialization in EducationInfo.objects.exclude(group_name='').values_list('group_name', 'specialization'):
+            specializations.setdefault(group_name, specialization)
+        shards = {}
+        for group_name, specialization in specializations.items():
+            candidates = shards_for_specialization(specialization)
+            shards[group_name] = candidates[0] if candidates else None
+
+        # Предметы групп - один запрос с группировкой (без сортировки модели по score,
+        # иначе DISTINCT считался бы по каждой оценке)
+        groups = defaultdict(set)
+        subjects = (
+            AcademicRecord.objects.filter(student__education__group_name__gt='')
+            .order_by()
+            .values_list('student__education__group_name', 'subject_name')
+            .distinct()
+        )
+        for group_name, subject in subjects:
+            groups[group_name].add(subject)
+
+        # Топ спроса читается один раз для всех шардов
+        demand = top_skills_by_shard(set(shards.values()), weeks=weeks)
+
+        rows = []
+        for group_name in sorted(specializations):
+            shard = shards[group_name]
+            gaps, present = skill_gaps(sorted(groups[group_name]), demand=demand[shard])
+            rows.append({
+                'group_name': group_name,
+                'specialization': specializations[group_name],
+                'shard': shard or 'все',
+                'gaps': gaps,
+                'present': present,
+            })
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Пробелы в навыках по группам',
+            'weeks': weeks,
+            'rows': rows,
+        }
+        return TemplateResponse(request, 'admin/core/skilldemand/gaps.html', context)
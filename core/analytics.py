@@ -0,0 +1,206 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import SkillDemand, Vacancy
+from .skills import SkillGazetteer, normalize_skill
+
+# Поля вакансии, от которых зависит ее вклад в SkillDemand
+STATE_FIELDS = ('hh_id', 'shard', 'city', 'published_at', 'skills', 'is_archived')
+
+
+def week_start(published_at):
+    if published_at is None:
+        return None
+    day = timezone.localtime(published_at).date() if timezone.is_aware(published_at) else published_at.date()
+    return day - timedelta(days=day.weekday())
+
+
+def contributions(state):
+    """
+    Вклад одной вакансии: {(shard, city, week, skill): 1} и отображаемые названия навыков.
+    Архивные вакансии и вакансии без даты публикации не учитываются.
+    """
+    keys = Counter()
+    names = {}
+    if state is None or state.get('is_archived'):
+        return keys, names
+    week = week_start(state.get('published_at'))
+    if week is None:
+        return keys, names
+    for name in state.get('skills') or []:
+        skill = normalize_skill(name)[:200]
+        if not skill:
+            continue
+        key = (state.get('shard') or '', state.get('city') or '', week, skill)
+        if key not in keys:
+            keys[key] = 1
+            names[skill] = name.strip()[:200]
+    return keys, names
+
+
+def stored_states(hh_ids, lock=False):
+    """
+    Текущее состояние вакансий в БД (до изменения) по hh_id.
+    lock=True - строки блокируются до конца транзакции (select_for_update)
+    """
+    queryset = Vacancy.objects.filter(hh_id__in=list(hh_ids))
+    if lock:
+        queryset = queryset.select_for_update()
+    return {row['hh_id']: row for row in queryset.values(*STATE_FIELDS)}
+
+
+def state_delta(before, after):
+    """
+    Разница вкладов двух наборов состояний {hh_id: state}
+    """
+    delta = Counter()
+    names = {}
+    for hh_id in set(before) | set(after):
+        old, _ = contributions(before.get(hh_id))
+        new, new_names = contributions(after.get(hh_id))
+        delta.update(new)
+        delta.subtract(old)
+        names.update(new_names)
+    return {key: value for key, value in delta.items() if value}, names
+
+
+def apply_delta(delta, names=None):
+    """
+    Применяет изменения счетчиков: затрагиваются только строки ключей из delta
+    """
+    if not delta:
+        return 0
+    names = names or {}
+    shards, cities, weeks, skills = (set(values) for values in zip(*delta))
+
+    with transaction.atomic():
+        # Выборка по IN-спискам - надмножество нужных строк, лишние отбрасываются по ключу
+        rows = SkillDemand.objects.select_for_update().filter(
+            shard__in=shards, city__in=cities, week__in=weeks, skill__in=skills,
+        )
+        existing = {(row.shard, row.city, row.week, row.skill): row for row in rows}
+        existing = {key: row for key, row in existing.items() if key in delta}
+        now = timezone.now()
+        to_update, to_create, to_delete = [], [], []
+        for key, change in delta.items():
+            row = existing.get(key)
+            if row is None:
+                if change > 0:
+                    shard, city, week, skill = key
+                    to_create.append(SkillDemand(
+                        shard=shard, city=city, week=week, skill=skill,
+                        name=names.get(skill, skill), count=change,
+                    ))
+                continue
+            row.count += change
+            row.updated_at = now
+            if row.count > 0:
+                to_update.append(row)
+            else:
+                to_delete.append(row.pk)
+
+        SkillDemand.objects.bulk_update(to_update, ['count', 'updated_at'], batch_size=500)
+        SkillDemand.objects.bulk_create(to_create, batch_size=500)
+        if to_delete:
+            SkillDemand.objects.filter(pk__in=to_delete).delete()
+    return len(delta)
+
+
+def rebuild_skill_demand():
+    """
+    Полный пересчет агрегатов по всем активным вакансиям (первичное заполнение, исправление расхождений)
+    """
+    totals = Counter()
+    names = {}
+    for state in Vacancy.objects.filter(is_archived=False).values(*STATE_FIELDS).iterator(chunk_size=2000):
+        keys, state_names = contributions(state)
+        totals.update(keys)
+        names.update(state_names)
+
+    with transaction.atomic():
+        SkillDemand.objects.all().delete()
+        SkillDemand.objects.bulk_create(
+            [
+                SkillDemand(shard=shard, city=city, week=week, skill=skill, name=names.get(skill, skill), count=count)
+                for (shard, city, week, skill), count in totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+# Чтение агрегатов
+
+def top_skills(shard=None, city=None, weeks=4, limit=20):
+    """
+    Самые востребованные навыки за последние `weeks` недель: [(skill, name, count), ...]
+    """
+    rows = SkillDemand.objects.filter(week__gte=week_start(timezone.now()) - timedelta(weeks=weeks - 1))
+    if shard:
+        rows = rows.filter(shard=shard)
+    if city:
+        rows = rows.filter(city=city)
+    return [
+        (row['skill'], row['label'], row['total'])
+        for row in rows.values('skill').annotate(label=Max('name'), total=Sum('count')).order_by('-total', 'skill')[:limit]
+    ]
+
+
+def top_skills_by_shard(shards, city=None, weeks=4, limit=20):
+    """
+    top_skills() сразу для нескольких шардов одним сгруппированным запросом:
+    {shard: [(skill, name, count), ...]}. Ключ None - спрос по всем шардам.
+    """
+    shards = set(shards)
+    rows = SkillDemand.objects.filter(week__gte=week_start(timezone.now()) - timedelta(weeks=weeks - 1))
+    if city:
+        rows = rows.filter(city=city)
+    if None not in shards:
+        rows = rows.filter(shard__in=shards)
+
+    totals = {shard: defaultdict(int) for shard in shards}
+    labels = {shard: {} for shard in shards}
+    for row in rows.values('shard', 'skill').annotate(label=Max('name'), total=Sum('count')).order_by():
+        for shard in {row['shard'], None} & shards:
+            totals[shard][row['skill']] += row['total']
+            labels[shard][row['skill']] = max(labels[shard].get(row['skill'], ''), row['label'])
+    return {
+        shard: sorted(
+            ((skill, labels[shard][skill], total) for skill, total in totals[shard].items()),
+            key=lambda item: (-item[2], item[0]),
+        )[:limit]
+        for shard in shards
+    }
+
+
+def weekly_trend(skill, shard=None, weeks=8):
+    """
+    Число вакансий с навыком по неделям: [(week, count), ...]
+    """
+    rows = SkillDemand.objects.filter(
+        skill=normalize_skill(skill),
+        week__gte=week_start(timezone.now()) - timedelta(weeks=weeks - 1),
+    )
+    if shard:
+        rows = rows.filter(shard=shard)
+    return list(rows.values_list('week').annotate(total=Sum('count')).order_by('week'))
+
+
+def skill_gaps(subjects, shard=None, city=None, weeks=4, limit=20, demand=None):
+    """
+    Востребованные навыки, которых нет в названиях предметов (AcademicRecord.subject_name).
+    Словарь строится только из топа спроса, поэтому поиск идет по небольшому автомату.
+    demand - уже прочитанный top_skills(), чтобы не запрашивать его для каждой группы.
+    Возвращает (пробелы, покрытые навыки): списки (name, count).
+    """
+    if demand is None:
+        demand = top_skills(shard=shard, city=city, weeks=weeks, limit=limit)
+    gazetteer = SkillGazetteer(name for _, name, _ in demand)
+    covered = gazetteer.extract(subjects)
+    gaps = [(name, count) for skill, name, count in demand if skill not in covered]
+    present = [(name, count) for skill, name, count in demand if skill in covered]
+    return gaps, present
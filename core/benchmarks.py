@@ -0,0 +1,237 @@
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+
+from users.models import StudentProfile, EducationInfo, AcademicRecord, PracticeExperience
+
+from .ml_recommender import VacancyRecommender
+from .services import _build_vacancy
+
+# Словари для синтетических данных
+
+SPECIALIZATIONS = [
+    'Информационные системы', 'Вычислительная техника и программное обеспечение',
+    'Учет и аудит', 'Финансы', 'Ветеринарная медицина', 'Агрономия',
+    'Педагогика и психология', 'Электроэнергетика', 'Юриспруденция', 'Туризм',
+]
+
+SUBJECTS = [
+    'Алгоритмы и структуры данных', 'Базы данных', 'Программирование на Python', 'Веб-разработка',
+    'Компьютерные сети', 'Операционные системы', 'Машинное обучение', 'Информационная безопасность',
+    'Бухгалтерский учет', 'Финансовый менеджмент', 'Микроэкономика', 'Маркетинг', 'Аудит',
+    'Анатомия животных', 'Ветеринарная фармакология', 'Растениеводство', 'Почвоведение',
+    'Педагогическая психология', 'Методика преподавания', 'Электротехника', 'Релейная защита',
+    'Гражданское право', 'Уголовный процесс', 'Английский язык', 'Казахский язык', 'Философия',
+    'История Казахстана', 'Математический анализ', 'Линейная алгебра', 'Статистика',
+]
+
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F']
+
+POSITIONS = [
+    'Стажер-программист', 'Помощник бухгалтера', 'Лаборант', 'Ассистент ветеринара',
+    'Практикант-педагог', 'Инженер-стажер', 'Помощник юриста', 'Младший аналитик',
+]
+
+TITLES = [
+    'Python разработчик', 'Frontend разработчик', 'Системный администратор', 'Аналитик данных',
+    'Бухгалтер', 'Экономист', 'Менеджер по продажам', 'Кассир', 'Ветеринарный врач',
+    'Агроном', 'Учитель математики', 'Психолог', 'Инженер-электрик', 'Юрист', 'Менеджер по туризму',
+    'Оператор call-центра', 'Продавец-консультант', 'Водитель', 'Тестировщик', 'DevOps инженер',
+]
+
+SKILLS = [
+    'Python', 'Django', 'SQL', 'PostgreSQL', 'Git', 'Linux', 'JavaScript', 'React', 'HTML', 'CSS',
+    'Docker', 'Excel', '1С: Бухгалтерия', 'Налоговая отчетность', 'Аудит', 'MS Office', 'Продажи',
+    'Работа с клиентами', 'Ветеринария', 'Агрономия', 'Педагогика', 'Английский язык',
+    'Деловая переписка', 'Электромонтаж', 'AutoCAD', 'Договорная работа', 'Гражданское право',
+    'Машинное обучение', 'Pandas', 'Статистика', 'Тестирование', 'Kubernetes',
+]
+
+CITIES = [('160', 'Алматы'), ('159', 'Астана'), ('205', 'Шымкент'), ('177', 'Караганда'), ('208', 'Семей')]
+EMPLOYMENTS = [('full', 'Полная занятость'), ('part', 'Частичная занятость'), ('probation', 'Стажировка')]
+EXPERIENCES = ['noExperience', 'between1And3', 'between3And6']
+
+
+def synthetic_hh_items(count, seed=0):
+    """
+    Элементы поиска HH (как в ответе /vacancies) вместе с key_skills из деталей
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        area_id, city = rng.choice(CITIES)
+        employment_id, employment = rng.choice(EMPLOYMENTS)
+        salary_from = rng.choice([None, 150000, 200000, 300000, 450000])
+        title = rng.choice(TITLES)
+        skills = rng.sample(SKILLS, rng.randint(0, 6))
+        items.append({
+            'id': str(10_000_000 + i),
+            'name': f"{title} {rng.choice(['', 'junior', 'стажер', 'в команду', 'со знанием ' + rng.choice(SKILLS)])}".strip(),
+            'url': f"https://api.hh.ru/vacancies/{10_000_000 + i}",
+            'alternate_url': f"https://hh.kz/vacancy/{10_000_000 + i}",
+            'area': {'id': area_id, 'name': city},
+            'employer': {'id': str(rng.randint(1, 5000)), 'name': f"Компания {rng.randint(1, 5000)}"},
+            'employment': {'id': employment_id, 'name': employment},
+            'experience': {'id': rng.choice(EXPERIENCES)},
+            'salary': {
+                'from': salary_from,
+                'to': salary_from + 100000 if salary_from and rng.random() < 0.5 else None,
+                'currency': 'KZT',
+            } if salary_from else None,
+            'snippet': {
+                'requirement': f"Знание {', '.join(rng.sample(SKILLS, 3))}. <highlighttext>{title}</highlighttext>",
+            },
+            'published_at': (date.today() - timedelta(days=rng.randint(0, 29))).isoformat() + 'T10:00:00+0500',
+            'key_skills': [{'name': skill} for skill in skills],
+        })
+    return items
+
+
+def synthetic_vacancies(count, seed=0):
+    """
+    Вакансии в том виде, в каком их получает VacancyRecommender
+    """
+    return [
+        _build_vacancy(item, [skill['name'] for skill in item['key_skills']])
+        for item in synthetic_hh_items(count, seed)
+    ]
+
+
+def create_synthetic_student(index, records=40, practices=2, seed=0):
+    """
+    Студент с образованием, оценками и практиками в БД.
+    Вызывать внутри транзакции, которая потом откатывается.
+    """
+    rng = random.Random(seed * 1000 + index)
+    user = User.objects.create(username=f"bench_student_{seed}_{index}", first_name='Bench')
+    profile = StudentProfile.objects.create(user=user, person_id=f"bench-{seed}-{index}")
+    EducationInfo.objects.create(
+        student=profile,
+        profession=rng.choice(SPECIALIZATIONS),
+        specialization=rng.choice(SPECIALIZATIONS),
+        qualification='Бакалавр',
+    )
+    AcademicRecord.objects.bulk_create([
+        AcademicRecord(
+            student=profile,
+            subject_name=rng.choice(SUBJECTS),
+            credits=rng.choice([3, 5]),
+            grade=rng.choice(GRADES),
+            score=rng.randint(50, 100),
+        )
+        for _ in range(records)
+    ])
+    PracticeExperience.objects.bulk_create([
+        PracticeExperience(
+            student=profile,
+            organization=f"Организация {rng.randint(1, 100)}",
+            position=rng.choice(POSITIONS),
+            start_date=date.today() - timedelta(days=rng.randint(30, 700)),
+            practice_type=rng.choice(['Учебная', 'Производственная', 'Преддипломная']),
+        )
+        for _ in range(practices)
+    ])
+    return profile
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99), 'max': ordered[-1]}
+
+
+def _measure(func, repeat):
+    """
+    Время (мс) `repeat` вызовов и пиковая память (КиБ) отдельного вызова под tracemalloc
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = percentiles(timings)
+    stats['peak_kib'] = peak / 1024
+    return stats, result
+
+
+def run_recommender_benchmark(students, sizes, repeat=5, seed=0):
+    """
+    Замеряет этапы VacancyRecommender по отдельности для каждого размера корпуса.
+    Возвращает {'<size>': {'<stage>': {p50, p95, p99, max, peak_kib}}}.
+    """
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    recommender = VacancyRecommender()
+    results = {}
+
+    for size in sizes:
+        vacancies = synthetic_vacancies(size, seed)
+        stages = {}
+
+        stages['student_text'], student_texts = _measure(
+            lambda: [recommender._build_student_text(student) for student in students], repeat,
+        )
+        student_text = student_texts[0]
+
+        stages['vacancy_text'], vacancy_texts = _measure(
+            lambda: [recommender._build_vacancy_text(vacancy) for vacancy in vacancies], repeat,
+        )
+
+        all_texts = [student_text] + vacancy_texts
+        stages['vectorize'], matrix = _measure(lambda: recommender.vectorizer.fit_transform(all_texts), repeat)
+
+        stages['similarity'], similarities = _measure(lambda: cosine_similarity(matrix[0:1], matrix[1:])[0], repeat)
+
+        stages['ranking'], _ = _measure(
+            lambda: recommender._rank(students[0], [dict(v) for v in vacancies], similarities), repeat,
+        )
+
+        results[str(size)] = stages
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold=0.2):
+    """
+    Этапы, у которых p50 вырос больше чем на `threshold` относительно базовой линии
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage_name, stats in stages.items():
+            base = baseline.get(size, {}).get(stage_name)
+            if not base or not base.get('p50'):
+                continue
+            change = (stats['p50'] - base['p50']) / base['p50']
+            if change > threshold:
+                regressions.append((size, stage_name, base['p50'], stats['p50'], change))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
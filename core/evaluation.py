@@ -0,0 +1,166 @@
+import gc
+import json
+import math
+import time
+import tracemalloc
+
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from .benchmarks import percentiles
+from .ml_recommender import VacancyRecommender
+
+
+class PrefitRecommender(VacancyRecommender):
+    """
+    TF-IDF обучается один раз на снимке вакансий; на запрос трансформируется только текст студента
+    """
+
+    def prepare(self, vacancies):
+        self.vectorizer = TfidfVectorizer(max_features=500, ngram_range=(1, 2), min_df=1)
+        self.matrix = self.vectorizer.fit_transform([self._build_vacancy_text(v) for v in vacancies])
+
+    def _similarities(self, student_text, vacancy_texts):
+        return cosine_similarity(self.vectorizer.transform([student_text]), self.matrix)[0]
+
+
+class HashingRecommender(VacancyRecommender):
+    """
+    HashingVectorizer вместо словаря: нет построения vocabulary, IDF считается по запросу
+    """
+
+    def __init__(self, n_features=2 ** 18, **kwargs):
+        super().__init__(**kwargs)
+        self.hasher = HashingVectorizer(ngram_range=(1, 2), n_features=n_features, alternate_sign=False, norm=None)
+
+    def _similarities(self, student_text, vacancy_texts):
+        matrix = TfidfTransformer().fit_transform(self.hasher.transform([student_text] + vacancy_texts))
+        return cosine_similarity(matrix[0:1], matrix[1:])[0]
+
+
+class SVDRecommender(PrefitRecommender):
+    """
+    Предобученный TF-IDF + TruncatedSVD: сравнение в плотном пространстве малой размерности
+    """
+
+    def __init__(self, components=100, **kwargs):
+        super().__init__(**kwargs)
+        self.components = components
+
+    def prepare(self, vacancies):
+        super().prepare(vacancies)
+        components = max(1, min(self.components, self.matrix.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=components, random_state=0)
+        self.dense = normalize(self.svd.fit_transform(self.matrix))
+
+    def _similarities(self, student_text, vacancy_texts):
+        student = normalize(self.svd.transform(self.vectorizer.transform([student_text])))
+        return (self.dense @ student[0]).ravel()
+
+
+# Конфигурации для сравнения. 'exact' - текущая точная выдача TF-IDF без навыков,
+# эталон для метрик; приближения (prefit, hashing, svd) сравниваются с ним при том же
+# нулевом весе навыков, а 'skill_blend' показывает, насколько смешивание с совпадением
+# навыков (SKILL_BLEND_WEIGHT) уводит выдачу от TF-IDF
+SKILL_BLEND_WEIGHT = 0.25
+
+VARIANTS = {
+    'exact': lambda: VacancyRecommender(skill_weight=0),
+    'skill_blend': lambda: VacancyRecommender(skill_weight=SKILL_BLEND_WEIGHT),
+    'prefit': lambda: PrefitRecommender(skill_weight=0),
+    'hashing': lambda: HashingRecommender(skill_weight=0),
+    'svd': lambda: SVDRecommender(skill_weight=0),
+}
+REFERENCE = 'exact'
+
+
+def overlap_at_k(reference, ranking, k):
+    return len(set(reference[:k]) & set(ranking[:k])) / k if k else 0.0
+
+
+def ndcg_at_k(gains, ranking, k):
+    """
+    NDCG@k, где релевантность вакансии - ее скор в эталонной выдаче
+    """
+    dcg = sum(gains.get(item, 0.0) / math.log2(i + 2) for i, item in enumerate(ranking[:k]))
+    ideal = sorted(gains.values(), reverse=True)[:k]
+    idcg = sum(gain / math.log2(i + 2) for i, gain in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def _run_variant(recommender, students, vacancies, k):
+    """
+    Прогон одной конфигурации: ранжирования (id вакансий, скор) и задержки по запросам
+    """
+    rankings = []
+    timings = []
+    for student in students:
+        copies = [dict(v) for v in vacancies]
+        gc.collect()
+        started = time.perf_counter()
+        result = recommender.get_recommendations(student, copies, top_n=k)
+        timings.append((time.perf_counter() - started) * 1000)
+        rankings.append([(v['id'], v.get('similarity_score', 0.0) / 100) for v in result])
+
+    # Пиковая память одного запроса
+    copies = [dict(v) for v in vacancies]
+    gc.collect()
+    tracemalloc.start()
+    recommender.get_recommendations(students[0], copies, top_n=k)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rankings, timings, peak
+
+
+def evaluate(students, vacancies, variants=None, k=10):
+    """
+    Прогоняет студентов через конфигурации VacancyRecommender на одном снимке вакансий.
+    Возвращает {'<variant>': {overlap, ndcg, p50, p95, p99, max, peak_kib, prepare_ms}}.
+    """
+    names = list(variants or VARIANTS)
+    if REFERENCE not in names:
+        names.insert(0, REFERENCE)
+
+    # Эталонная выдача считается по всему списку, чтобы знать релевантность любой вакансии
+    reference = VARIANTS[REFERENCE]()
+    reference_gains = []
+    reference_top = []
+    for student in students:
+        ranked = reference.get_recommendations(student, [dict(v) for v in vacancies], top_n=len(vacancies))
+        # Запасная выдача (нет текста студента, ошибка векторизации) приходит без скоров
+        reference_gains.append({v['id']: v.get('similarity_score', 0.0) / 100 for v in ranked})
+        reference_top.append([v['id'] for v in ranked[:k]])
+
+    results = {}
+    for name in names:
+        recommender = VARIANTS[name]()
+        prepare_ms = 0.0
+        if hasattr(recommender, 'prepare'):
+            started = time.perf_counter()
+            recommender.prepare(vacancies)
+            prepare_ms = (time.perf_counter() - started) * 1000
+
+        rankings, timings, peak = _run_variant(recommender, students, vacancies, k)
+        ids = [[item for item, _ in ranking] for ranking in rankings]
+        stats = percentiles(timings)
+        stats.update(
+            overlap=sum(overlap_at_k(ref, ranking, k) for ref, ranking in zip(reference_top, ids)) / len(students),
+            ndcg=sum(ndcg_at_k(gains, ranking, k) for gains, ranking in zip(reference_gains, ids)) / len(students),
+            peak_kib=peak / 1024,
+            prepare_ms=prepare_ms,
+        )
+        results[name] = stats
+    return results
+
+
+def load_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(path, vacancies):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(vacancies, f, ensure_ascii=False, default=str)
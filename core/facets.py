@@ -0,0 +1,177 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger('core')
+
+
+# Справочники HH для формы фильтров на дашборде
+EMPLOYMENT_CHOICES = [
+    ('full', 'Полная занятость'),
+    ('part', 'Частичная занятость'),
+    ('project', 'Проектная работа'),
+    ('volunteer', 'Волонтерство'),
+    ('probation', 'Стажировка'),
+]
+
+EXPERIENCE_CHOICES = [
+    ('noExperience', 'Нет опыта'),
+    ('between1And3', 'От 1 года до 3 лет'),
+    ('between3And6', 'От 3 до 6 лет'),
+    ('moreThan6', 'Более 6 лет'),
+]
+
+CURRENCY_CHOICES = [
+    ('KZT', '₸'),
+    ('RUR', '₽'),
+    ('USD', '$'),
+    ('EUR', '€'),
+]
+
+# Валюта границ зарплаты, если валюта в фильтре не выбрана
+SALARY_DEFAULT_CURRENCY = 'kzt'
+
+# Категориальные фасеты: имя фильтра -> ключ в словаре вакансии
+CATEGORICAL_FACETS = {
+    'city': 'city',
+    'employment': 'employment_id',
+    'experience': 'experience_id',
+    'currency': 'currency',
+}
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    return str(value).strip().lower()
+
+
+def parse_filters(query):
+    """
+    Разбирает фильтры дашборда из GET-параметров (QueryDict или dict)
+    """
+    filters = {}
+
+    for name in CATEGORICAL_FACETS:
+        if hasattr(query, 'getlist'):
+            values = query.getlist(name)
+        else:
+            values = query.get(name) or []
+            if isinstance(values, str):
+                values = [values]
+        values = [_normalize(v) for v in values if _normalize(v)]
+        if values:
+            filters[name] = values
+
+    for name in ('salary_min', 'salary_max'):
+        raw = query.get(name)
+        if raw in (None, ''):
+            continue
+        try:
+            filters[name] = int(raw)
+        except (TypeError, ValueError):
+            logger.debug("Некорректное значение фильтра %s=%r, пропускаем", name, raw)
+
+    if len(filters.get('currency', [])) > 1:
+        # Границы зарплаты задаются в одной валюте: при нескольких валютах они не применяются
+        for name in ('salary_min', 'salary_max'):
+            if filters.pop(name, None) is not None:
+                logger.debug("Фильтр %s игнорируется: выбрано несколько валют", name)
+
+    return filters
+
+
+def salary_currency(filters):
+    """
+    Валюта, в которой заданы salary_min/salary_max: выбранная валюта, без нее - тенге.
+    При нескольких валютах parse_filters() отбрасывает границы зарплаты.
+    """
+    currencies = filters.get('currency') or []
+    return _normalize(currencies[0]) if currencies else SALARY_DEFAULT_CURRENCY
+
+
+class FacetIndex:
+    """
+    Битмап-индексы по фасетам вакансий (город, занятость, опыт, валюта, зарплата).
+
+    Для каждого значения категориального фасета хранится булева маска по всем
+    вакансиям; запрос пересекает маски ДО вычисления similarity, поэтому
+    векторизуются и скорятся только подходящие вакансии.
+    """
+
+    def __init__(self, vacancies):
+        self.size = len(vacancies)
+        self.bitmaps = {name: {} for name in CATEGORICAL_FACETS}
+        self.salary_from = np.full(self.size, np.nan)
+        self.salary_to = np.full(self.size, np.nan)
+
+        for i, vacancy in enumerate(vacancies):
+            for name, key in CATEGORICAL_FACETS.items():
+                value = _normalize(vacancy.get(key))
+                if not value:
+                    continue
+                bitmap = self.bitmaps[name].get(value)
+                if bitmap is None:
+                    bitmap = self.bitmaps[name][value] = np.zeros(self.size, dtype=bool)
+                bitmap[i] = True
+
+            if vacancy.get('salary_from') is not None:
+                self.salary_from[i] = vacancy['salary_from']
+            if vacancy.get('salary_to') is not None:
+                self.salary_to[i] = vacancy['salary_to']
+
+        # Открытые границы вилки заменяем противоположной границей
+        self._salary_low = np.where(np.isnan(self.salary_from), self.salary_to, self.salary_from)
+        self._salary_high = np.where(np.isnan(self.salary_to), self.salary_from, self.salary_to)
+
+    def values(self, name):
+        """
+        Значения фасета, встречающиеся в индексе
+        """
+        return sorted(self.bitmaps.get(name, {}))
+
+    def mask(self, filters):
+        """
+        Булева маска вакансий, удовлетворяющих всем фильтрам.
+        Внутри фасета значения объединяются (OR), между фасетами - пересечение (AND).
+        """
+        result = np.ones(self.size, dtype=bool)
+        if not filters:
+            return result
+
+        for name in CATEGORICAL_FACETS:
+            values = filters.get(name)
+            if not values:
+                continue
+            facet_mask = np.zeros(self.size, dtype=bool)
+            for value in values:
+                bitmap = self.bitmaps[name].get(_normalize(value))
+                if bitmap is not None:
+                    facet_mask |= bitmap
+            result &= facet_mask
+
+        salary_min = filters.get('salary_min')
+        salary_max = filters.get('salary_max')
+        if salary_min is not None or salary_max is not None:
+            # Суммы в разных валютах несравнимы: фильтр проходят только вакансии в валюте границ.
+            # Вакансии без зарплаты не проходят зарплатный фильтр
+            currency_bitmap = self.bitmaps['currency'].get(salary_currency(filters))
+            if currency_bitmap is None:
+                return np.zeros(self.size, dtype=bool)
+            with np.errstate(invalid='ignore'):
+                salary_mask = currency_bitmap & ~np.isnan(self._salary_low)
+                if salary_min is not None:
+                    salary_mask &= self._salary_high >= salary_min
+                if salary_max is not None:
+                    salary_mask &= self._salary_low <= salary_max
+            result &= salary_mask
+
+        return result
+
+    def select(self, vacancies, filters):
+        """
+        Возвращает только вакансии, прошедшие фильтры
+        """
+        if not filters:
+            return vacancies
+        indices = np.flatnonzero(self.mask(filters))
+        return [vacancies[i] for i in indices]
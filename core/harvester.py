@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .services import _build_vacancy, store_vacancies
+
+logger = logging.getLogger('core')
+
+
+class HHHarvester:
+    """
+    Параллельный обход страниц поиска HH с сохранением вакансий в локальное хранилище.
+
+    HH отдает не больше 2000 результатов на один запрос (per_page <= 100, 20 страниц),
+    поэтому период разбивается на срезы по датам (и, опционально, профессиональным
+    ролям). Срез, в котором найдено больше лимита, делится пополам по времени.
+    Срезы, все страницы которых загружены, пишутся в чекпоинт, и прерванный запуск
+    продолжается с места остановки; срезы с ошибками остаются в очереди и повторяются.
+    После полного прохода без ошибок чекпоинт сбрасывается.
+    """
+
+    MAX_PER_PAGE = 100
+    MAX_DEPTH = 2000
+    MIN_SLICE = timedelta(hours=1)
+
+    def __init__(self, days=30, slice_hours=24, roles=None, workers=4, checkpoint_path=None, area='40'):
+        self.days = days
+        self.slice_hours = slice_hours
+        self.roles = roles or [None]
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.area = area
+        self.headers = {'User-Agent': 'CareerAI/1.0'}
+        self._local = threading.local()
+        self.executor = None
+        self.run_started_at = None
+        self.stats = {'pages': 0, 'items': 0, 'stored': 0, 'errors': 0, 'slices': 0, 'truncated': 0}
+
+    # Чекпоинт
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path:
+            return {'done': []}
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'done': []}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Не удалось прочитать чекпоинт {self.checkpoint_path}: {e}")
+            return {'done': []}
+
+    def _save_checkpoint(self, checkpoint):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        # Атомарная замена, чтобы прерывание не оставило битый файл
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset_checkpoint(self):
+        self._save_checkpoint({'done': [], 'truncated': [], 'started_at': None})
+
+    # Срезы
+
+    def window_start(self, now=None):
+        """
+        Начало окна публикации, которое обходит проход (полночь `days` дней назад)
+        """
+        now = now or datetime.now()
+        return (now - timedelta(days=self.days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def slices(self, now=None):
+        """
+        Срезы (date_from, date_to, role) за последние `days` дней.
+        Границы отсчитываются от полуночи, чтобы ключи совпадали между запусками.
+        """
+        now = (now or datetime.now()).replace(second=0, microsecond=0)
+        start = self.window_start(now)
+        step = timedelta(hours=self.slice_hours)
+        for role in self.roles:
+            date_from = start
+            while date_from < now:
+                date_to = min(date_from + step, now)
+                yield date_from, date_to, role
+                date_from = date_to
+
+    @staticmethod
+    def slice_key(date_from, date_to, role):
+        return f"{date_from.isoformat()}|{date_to.isoformat()}|{role or ''}"
+
+    # HTTP
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def _params(self, date_from, date_to, role, page):
+        params = {
+            'area': self.area,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'per_page': self.MAX_PER_PAGE,
+            'page': page,
+            'order_by': 'publication_time',
+        }
+        if role:
+            params['professional_role'] = role
+        return params
+
+    def _fetch_page(self, date_from, date_to, role, page):
+        response = self._session().get(
+            settings.HH_API_URL,
+            params=self._params(date_from, date_to, role, page),
+            timeout=10,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    # Обход
+
+    def _store_page(self, data):
+        items = data.get('items', [])
+        self.stats['pages'] += 1
+        self.stats['items'] += len(items)
+        self.stats['stored'] += self.process_items(items)
+
+    def process_items(self, items):
+        """
+        Сохраняет элементы одной страницы поиска; возвращает число сохраненных вакансий.
+        Детали (key_skills) здесь не грузим и не затираем - это задача refresh.
+        """
+        return store_vacancies([_build_vacancy(item, []) for item in items], with_details=False)
+
+    def harvest_slice(self, executor, date_from, date_to, role):
+        """
+        Обходит все страницы одного среза; возвращает число полученных вакансий
+        """
+        first = self._fetch_page(date_from, date_to, role, 0)
+        found = first.get('found', 0)
+
+        if found > self.MAX_DEPTH and date_to - date_from > self.MIN_SLICE:
+            middle = date_from + (date_to - date_from) / 2
+            middle = middle.replace(second=0, microsecond=0)
+            logger.info(f"  ✂️  Срез {date_from:%Y-%m-%d %H:%M}: найдено {found} > {self.MAX_DEPTH}, делим пополам")
+            return (self.harvest_slice(executor, date_from, middle, role)
+                    + self.harvest_slice(executor, middle, date_to, role))
+
+        self._store_page(first)
+        received = len(first.get('items', []))
+
+        max_pages = self.MAX_DEPTH // self.MAX_PER_PAGE
+        pages = min(first.get('pages', 1), max_pages)
+        futures = [
+            executor.submit(self._fetch_page, date_from, date_to, role, page)
+            for page in range(1, pages)
+        ]
+        for future in as_completed(futures):
+            try:
+                data = future.result()
+            except requests.RequestException as e:
+                self.stats['errors'] += 1
+                logger.warning(f"  ⚠️  Ошибка загрузки страницы среза {date_from:%Y-%m-%d %H:%M}: {e}")
+                continue
+            self._store_page(data)
+            received += len(data.get('items', []))
+
+        if found > self.MAX_DEPTH:
+            self.stats['truncated'] += 1
+            logger.warning(f"  ⚠️  Срез {date_from:%Y-%m-%d %H:%M} превышает лимит HH даже после деления, часть вакансий пропущена")
+        return received
+
+    def run(self):
+        checkpoint = self._load_checkpoint()
+        done = set(checkpoint.get('done', []))
+        # Срезы, обрезанные лимитом HH: повтор не поможет, но проход считается неполным
+        truncated = set(checkpoint.get('truncated', []))
+        if not done or not checkpoint.get('started_at'):
+            checkpoint['started_at'] = timezone.now().isoformat()
+        # Начало прохода (с учетом прерванных запусков, продолженных из чекпоинта)
+        self.run_started_at = parse_datetime(checkpoint['started_at'])
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.executor = executor
+            for date_from, date_to, role in self.slices():
+                key = self.slice_key(date_from, date_to, role)
+                if key in done:
+                    continue
+
+                slice_started = time.perf_counter()
+                errors_before = self.stats['errors']
+                truncated_before = self.stats['truncated']
+                try:
+                    received = self.harvest_slice(executor, date_from, date_to, role)
+                except requests.RequestException as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"❌ Срез {key} не загружен: {e}")
+                    continue
+
+                if self.stats['errors'] > errors_before:
+                    # Часть страниц не загружена - срез не отмечается и будет повторен
+                    logger.error(f"❌ Срез {key} загружен не полностью, будет повторен")
+                    continue
+
+                elapsed = time.perf_counter() - slice_started
+                self.stats['slices'] += 1
+                logger.info(
+                    f"  ✓ Срез {date_from:%Y-%m-%d %H:%M} - {date_to:%Y-%m-%d %H:%M}"
+                    f"{f' (роль {role})' if role else ''}: {received} вакансий, "
+                    f"{received / elapsed if elapsed else 0:.1f} вак/с"
+                )
+
+                done.add(key)
+                checkpoint['done'] = sorted(done)
+                if self.stats['truncated'] > truncated_before:
+                    truncated.add(key)
+                    checkpoint['truncated'] = sorted(truncated)
+                self._save_checkpoint(checkpoint)
+
+        # С учетом срезов, обрезанных в прерванных ранее запусках
+        self.stats['truncated'] = len(truncated)
+        if not self.stats['errors']:
+            # Полный проход завершен - следующий запуск начнет заново
+            self.reset_checkpoint()
+
+        self.stats['seconds'] = time.perf_counter() - started
+        self.stats['per_second'] = self.stats['items'] / self.stats['seconds'] if self.stats['seconds'] else 0
+        return self.stats
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from .benchmarks import GRADES, POSITIONS, SPECIALIZATIONS, SUBJECTS, percentiles, synthetic_hh_items
+
+LOGIN_PASSWORD = 'loadtest'
+# Префикс id вакансий и логинов, созданных нагрузочным тестом: по нему удаляются только они
+SYNTHETIC_PREFIX = 'loadtest-'
+
+
+class FakeUpstream:
+    """
+    Локальные заглушки внешних API: HH (список и детали вакансий), авторизация
+    университета и данные студента. Задержка и доля ошибок настраиваются по типу запроса.
+
+        /hh/vacancies          - поиск HH (per_page, page)
+        /hh/vacancies/<id>     - детали вакансии с key_skills и ETag
+        /auth                  - POST {"login", "password"}, пароль LOGIN_PASSWORD
+        /student?studentid=... - данные студента
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, vacancies=2000, latency=None, jitter=0.2, errors=None, seed=0):
+        self.items = synthetic_hh_items(vacancies, seed)
+        for item in self.items:
+            item['id'] = f"{SYNTHETIC_PREFIX}{item['id']}"
+        self.by_id = {item['id']: item for item in self.items}
+        # Задержки в секундах и доли ошибок по типу: list, detail, auth, student
+        self.latency = latency or {}
+        self.jitter = jitter
+        self.errors = errors or {}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def settings(self):
+        """
+        Значения настроек Django, направляющие приложение на заглушки
+        """
+        return {
+            'HH_API_URL': f"{self.base_url}/hh/vacancies",
+            'EXTERNAL_API_URL': f"{self.base_url}/auth",
+            'STUDENT_DATA_API_URL': f"{self.base_url}/student",
+            'STUDENT_DATA_API_TOKEN': 'loadtest',
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    # Ответы
+
+    def _delay(self, kind):
+        latency = self.latency.get(kind, 0)
+        if latency:
+            time.sleep(max(0.0, random.uniform(latency * (1 - self.jitter), latency * (1 + self.jitter))))
+
+    def _failed(self, kind):
+        return random.random() < self.errors.get(kind, 0)
+
+    def vacancy_list(self, query):
+        per_page = min(int(query.get('per_page', ['20'])[0]), 100)
+        page = int(query.get('page', ['0'])[0])
+        chunk = self.items[page * per_page:(page + 1) * per_page]
+        items = []
+        for item in chunk:
+            item = {key: value for key, value in item.items() if key != 'key_skills'}
+            item['url'] = f"{self.base_url}/hh/vacancies/{item['id']}"
+            items.append(item)
+        return {
+            'items': items,
+            'found': len(self.items),
+            'pages': (len(self.items) + per_page - 1) // per_page,
+            'page': page,
+            'per_page': per_page,
+        }
+
+    def vacancy_detail(self, vacancy_id):
+        item = self.by_id.get(vacancy_id)
+        if item is None:
+            return None
+        return {'id': item['id'], 'name': item['name'], 'key_skills': item['key_skills']}
+
+    @staticmethod
+    def auth(payload):
+        login = str(payload.get('login') or '')
+        if not login or payload.get('password') != LOGIN_PASSWORD:
+            return {'status': 'error', 'success': False}
+        return {
+            'status': 'success',
+            'success': True,
+            'person': 'student',
+            'personid': login,
+            'firstname': 'Нагрузочный',
+            'lastname': f"Студент {login}",
+            'mail': f"{login}@example.com",
+        }
+
+    @staticmethod
+    def student_data(student_id):
+        rng = random.Random(int(hashlib.md5(student_id.encode()).hexdigest()[:8], 16))
+        return {
+            'status': 'success',
+            'data': {
+                'studentInfo': {'gpa': round(rng.uniform(2, 4), 2), 'courseNumber': rng.randint(1, 4), 'city': 'Семей'},
+                'educationInfo': {
+                    'profession': rng.choice(SPECIALIZATIONS),
+                    'specialization': rng.choice(SPECIALIZATIONS),
+                    'qualification': 'Бакалавр',
+                    'groupName': f"ГР-{rng.randint(1, 40)}",
+                },
+                'academicPerformance': [
+                    {'subjectName': rng.choice(SUBJECTS), 'credits': 5, 'grade': rng.choice(GRADES), 'score': rng.randint(50, 100)}
+                    for _ in range(rng.randint(10, 60))
+                ],
+                'practicalExperience': [
+                    {'organization': 'ТОО Практика', 'position': rng.choice(POSITIONS), 'startDate': '2024-06-01',
+                     'endDate': '2024-07-01', 'practiceType': 'Производственная'}
+                    for _ in range(rng.randint(0, 3))
+                ],
+            },
+        }
+
+    def _handler_class(self):
+        upstream = self
+        detail_re = re.compile(r'^/hh/vacancies/([\w-]+)$')
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, payload=None, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _respond(self, kind, build):
+                upstream._delay(kind)
+                if upstream._failed(kind):
+                    return self._send(500, {'error': 'injected'})
+                return build()
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                match = detail_re.match(parsed.path)
+                if parsed.path == '/hh/vacancies':
+                    return self._respond('list', lambda: self._send(200, upstream.vacancy_list(query)))
+                if match:
+                    def detail():
+                        payload = upstream.vacancy_detail(match.group(1))
+                        if payload is None:
+                            return self._send(404, {'error': 'not found'})
+                        etag = '"%s"' % hashlib.md5(json.dumps(payload).encode()).hexdigest()
+                        if self.headers.get('If-None-Match') == etag:
+                            return self._send(304, headers={'ETag': etag})
+                        return self._send(200, payload, headers={'ETag': etag})
+                    return self._respond('detail', detail)
+                if parsed.path == '/student':
+                    student_id = query.get('studentid', [''])[0]
+                    return self._respond('student', lambda: self._send(200, upstream.student_data(student_id)))
+                return self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    payload = {}
+                if urlparse(self.path).path == '/auth':
+                    return self._respond('auth', lambda: self._send(200, upstream.auth(payload)))
+                return self._send(404, {'error': 'not found'})
+
+        return Handler
+
+
+# Клиенты нагрузки
+
+class InProcessClient:
+    """
+    Сессия через django.test.Client: запросы идут через весь стек middleware без сети
+    """
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def get(self, path):
+        return self.client.get(path).status_code
+
+    def post(self, path, data):
+        return self.client.post(path, data).status_code
+
+
+class HttpClient:
+    """
+    Сессия к запущенному серверу приложения (с CSRF-токеном формы входа)
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def get(self, path):
+        return self.session.get(self.base_url + path, allow_redirects=False, timeout=60).status_code
+
+    def post(self, path, data):
+        url = self.base_url + path
+        if 'csrftoken' not in self.session.cookies:
+            self.session.get(url, timeout=60)
+        data = dict(data, csrfmiddlewaretoken=self.session.cookies.get('csrftoken', ''))
+        return self.session.post(url, data=data, headers={'Referer': url}, allow_redirects=False, timeout=60).status_code
+
+
+# Сценарии: список шагов (имя, метод, путь, данные, ожидаемые статусы)
+
+def _login_steps(worker, iteration):
+    login = f"{SYNTHETIC_PREFIX}{worker:03d}"
+    return [('login', 'post', '/accounts/login/', {'login': login, 'password': LOGIN_PASSWORD}, {302})]
+
+
+# Дашборд - оболочка страницы и отложенный фрагмент с карточками
+DASHBOARD_STEPS = [
+    ('dashboard', 'get', '/', None, {200}),
+    ('recommendations', 'get', '/recommendations/', None, {200}),
+]
+
+SCENARIOS = {
+    'guest_dashboard': lambda worker, iteration: list(DASHBOARD_STEPS),
+    'login_dashboard': lambda worker, iteration: _login_steps(worker, iteration) + DASHBOARD_STEPS + [
+        ('profile', 'get', '/accounts/profile/', None, {200}),
+    ],
+}
+
+
+def run_scenario(name, client_factory, concurrency=4, iterations=10):
+    """
+    Запускает `concurrency` параллельных сессий по `iterations` прогонов сценария.
+    Возвращает сводку: пропускная способность, перцентили задержки и доля ошибок по шагам.
+    """
+    scenario = SCENARIOS[name]
+    samples = {}
+    errors = {}
+    # Причины ошибок по шагам: код ответа или класс исключения
+    reasons = {}
+    lock = threading.Lock()
+
+    def worker(index):
+        client = client_factory()
+        for iteration in range(iterations):
+            for step, method, path, data, expected in scenario(index, iteration):
+                started = time.perf_counter()
+                reason = None
+                try:
+                    status = client.get(path) if method == 'get' else client.post(path, data)
+                    if status not in expected:
+                        reason = str(status)
+                except Exception as e:
+                    reason = type(e).__name__
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    samples.setdefault(step, []).append(elapsed)
+                    errors[step] = errors.get(step, 0) + int(reason is not None)
+                    if reason is not None:
+                        step_reasons = reasons.setdefault(step, {})
+                        step_reasons[reason] = step_reasons.get(reason, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    duration = time.perf_counter() - started
+
+    total_requests = sum(len(values) for values in samples.values())
+    return {
+        'scenario': name,
+        'concurrency': concurrency,
+        'sessions': concurrency * iterations,
+        'duration_s': duration,
+        'sessions_per_s': concurrency * iterations / duration if duration else 0,
+        'requests_per_s': total_requests / duration if duration else 0,
+        'steps': {
+            step: dict(
+                percentiles(values),
+                requests=len(values),
+                error_rate=errors[step] / len(values),
+                errors=reasons.get(step, {}),
+            )
+            for step, values in samples.items()
+        },
+    }
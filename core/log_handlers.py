@@ -0,0 +1,133 @@
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# Включен ли подробный (DEBUG) лог для текущего запроса
+_debug_sampled = contextvars.ContextVar('debug_sampled', default=False)
+
+logger = logging.getLogger('core')
+
+
+class ProcessQueueHandler(QueueHandler):
+    """
+    QueueHandler со своим QueueListener в каждом процессе.
+
+    Слушатель запускается при первой записи в текущем процессе. При gunicorn --preload
+    логирование настраивается в мастере, и после fork поток слушателя в воркере
+    не существует: воркер заводит собственные очередь и слушатель.
+    """
+
+    def __init__(self, targets, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        self.targets = targets
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        # При завершении процесса дописываем оставшиеся в очереди записи
+        atexit.register(self.stop_listener)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Блокировка могла быть захвачена другим потоком родителя в момент fork
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # Очередь родителя после fork никто не разбирает
+                self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=self.respect_handler_level)
+            self.listener.start()
+            self._pid = pid
+
+    def stop_listener(self):
+        listener, self.listener = self.listener, None
+        # Слушатель, унаследованный от родителя, в этом процессе не запущен
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        self._pid = None
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+
+def queue_listener_handler(handlers, respect_handler_level=True):
+    """
+    Фабрика для LOGGING ('()': 'core.log_handlers.queue_listener_handler').
+
+    Возвращает QueueHandler: поток запроса только кладет запись в очередь,
+    а форматирование и запись в файлы/консоль выполняет фоновый QueueListener.
+    """
+    # ConvertingList из dictConfig разрешает 'cfg://handlers.x' при обращении по индексу
+    resolved = [handlers[i] for i in range(len(handlers))]
+    return ProcessQueueHandler(resolved, respect_handler_level=respect_handler_level)
+
+
+class SampledDebugFilter(logging.Filter):
+    """
+    Фильтр логгеров приложения (LOGGING['loggers'][...]['filters']).
+
+    При LOG_DEBUG_SAMPLE_RATE > 0 уровень логгеров - DEBUG, а фильтр отбрасывает
+    записи ниже LOG_LEVEL вне запросов, попавших в выборку. Фильтр логгера
+    срабатывает до обработчиков, поэтому такие записи не форматируются и не попадают в очередь.
+    """
+
+    def filter(self, record):
+        return record.levelno >= logging.getLevelName(settings.LOG_LEVEL) or _debug_sampled.get()
+
+
+def debug_enabled(logger):
+    """
+    Пишется ли DEBUG в текущем запросе: для проверки перед сборкой дорогих строк лога
+    """
+    return logger.isEnabledFor(logging.DEBUG) and (
+        logging.getLevelName(settings.LOG_LEVEL) <= logging.DEBUG or _debug_sampled.get()
+    )
+
+
+class RequestLogMiddleware:
+    """
+    Одна структурированная строка на запрос; заодно решает, попадает ли
+    запрос в выборку подробного лога
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'LOG_DEBUG_SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        token = _debug_sampled.set(sampled)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _debug_sampled.reset(token)
+
+        user = getattr(request, 'user', None)
+        logger.info(
+            'request method=%s path=%s status=%s user=%s duration_ms=%.1f sampled=%d',
+            request.method,
+            request.path,
+            response.status_code,
+            user.username if user is not None and user.is_authenticated else '-',
+            (time.perf_counter() - started) * 1000,
+            sampled,
+        )
+        return response
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmarks import (
+    compare_with_baseline, create_synthetic_student, load_baseline, run_recommender_benchmark, save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк этапов VacancyRecommender на синтетических студентах и вакансиях'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000,100000', help='Размеры корпуса вакансий через запятую')
+        parser.add_argument('--records', default='10,40,80', help='Число оценок у синтетических студентов через запятую')
+        parser.add_argument('--practices', type=int, default=2, help='Максимум практик у студента')
+        parser.add_argument('--repeat', type=int, default=5, help='Повторов каждого замера')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--baseline', default=str(settings.BENCHMARK_BASELINE), help='Файл базовой линии')
+        parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как базовую линию')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Допустимый рост p50 (0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Завершиться с ошибкой при регрессии')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        records = [int(count) for count in options['records'].split(',') if count.strip()]
+
+        # Синтетические студенты живут только внутри транзакции и откатываются
+        with transaction.atomic():
+            students = [
+                create_synthetic_student(i, records=count, practices=i % (options['practices'] + 1), seed=options['seed'])
+                for i, count in enumerate(records)
+            ]
+            results = run_recommender_benchmark(students, sizes, repeat=options['repeat'], seed=options['seed'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'Вакансий':>9} {'Этап':<13} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10} {'пик, КиБ':>10}")
+        for size, stages in results.items():
+            for stage_name, stats in stages.items():
+                self.stdout.write(
+                    f"{size:>9} {stage_name:<13} {stats['p50']:>10.2f} {stats['p95']:>10.2f} "
+                    f"{stats['p99']:>10.2f} {stats['peak_kib']:>10.0f}"
+                )
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            save_baseline(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f"Базовая линия сохранена: {baseline_path}"))
+            return
+
+        baseline = load_baseline(baseline_path)
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f"Базовая линия не найдена ({baseline_path}), сравнение пропущено"))
+            return
+
+        regressions = compare_with_baseline(results, baseline, options['threshold'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('Регрессий относительно базовой линии нет'))
+            return
+
+        for size, stage_name, before, after, change in regressions:
+            self.stdout.write(self.style.ERROR(
+                f"Регрессия: {size} вакансий, {stage_name}: {before:.2f} -> {after:.2f} мс (+{change:.0%})"
+            ))
+        if options['fail_on_regression']:
+            raise CommandError(f"Найдено регрессий: {len(regressions)}")
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.benchmarks import create_synthetic_student, synthetic_vacancies
+from core.evaluation import VARIANTS, evaluate, load_snapshot, save_snapshot
+from core.models import Vacancy
+from users.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = 'Качество (overlap@k, NDCG@k относительно точной выдачи TF-IDF exact) и скорость конфигураций VacancyRecommender'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', default=','.join(VARIANTS), help='Конфигурации через запятую')
+        parser.add_argument('--k', type=int, default=10, help='Глубина выдачи для метрик')
+        parser.add_argument('--students', type=int, default=20, help='Сколько студентов взять из БД')
+        parser.add_argument('--synthetic', action='store_true', help='Синтетические студенты вместо реальных')
+        parser.add_argument('--snapshot', default=str(settings.EVALUATION_SNAPSHOT), help='Файл снимка вакансий')
+        parser.add_argument('--refresh-snapshot', action='store_true', help='Пересоздать снимок')
+        parser.add_argument('--synthetic-vacancies', type=int, default=0, help='Снимок из N синтетических вакансий')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        variants = [name.strip() for name in options['variants'].split(',') if name.strip()]
+        unknown = [name for name in variants if name not in VARIANTS]
+        if unknown:
+            raise CommandError(f"Неизвестные конфигурации: {', '.join(unknown)}")
+
+        vacancies = self._snapshot(options)
+        self.stdout.write(f"Снимок: {len(vacancies)} вакансий")
+
+        # Синтетические студенты живут только внутри транзакции и откатываются
+        with transaction.atomic():
+            students = self._students(options)
+            self.stdout.write(f"Студентов: {len(students)}")
+            results = evaluate(students, vacancies, variants, k=options['k'])
+            transaction.set_rollback(True)
+
+        k = options['k']
+        self.stdout.write(
+            f"{'Конфигурация':<13} {f'overlap@{k}':>11} {f'NDCG@{k}':>9} {'p50, мс':>9} {'p95, мс':>9} "
+            f"{'p99, мс':>9} {'пик, КиБ':>9} {'подготовка, мс':>15}"
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<13} {stats['overlap']:>11.3f} {stats['ndcg']:>9.3f} {stats['p50']:>9.2f} {stats['p95']:>9.2f} "
+                f"{stats['p99']:>9.2f} {stats['peak_kib']:>9.0f} {stats['prepare_ms']:>15.1f}"
+            )
+
+    def _snapshot(self, options):
+        path = Path(options['snapshot'])
+        if path.exists() and not options['refresh_snapshot'] and not options['synthetic_vacancies']:
+            return load_snapshot(path)
+
+        if options['synthetic_vacancies']:
+            vacancies = synthetic_vacancies(options['synthetic_vacancies'], options['seed'])
+        else:
+            vacancies = [v.as_dict() for v in Vacancy.objects.filter(is_archived=False).order_by('hh_id')]
+            if not vacancies:
+                raise CommandError('Локальное хранилище вакансий пусто: задайте --synthetic-vacancies или запустите harvest_vacancies')
+
+        save_snapshot(path, vacancies)
+        self.stdout.write(self.style.SUCCESS(f"Снимок сохранен: {path}"))
+        return load_snapshot(path)
+
+    def _students(self, options):
+        if not options['synthetic']:
+            students = list(
+                StudentProfile.objects.filter(academic_records__isnull=False)
+                .distinct().order_by('id')[:options['students']]
+            )
+            if students:
+                return students
+            self.stdout.write(self.style.WARNING('В БД нет студентов с оценками, используются синтетические'))
+        return [
+            create_synthetic_student(i, records=10 + (i * 7) % 70, practices=i % 3, seed=options['seed'])
+            for i in range(options['students'])
+        ]
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.harvester import HHHarvester
+
+
+class Command(BaseCommand):
+    help = 'Загружает вакансии HH постранично и параллельно в локальное хранилище'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.VACANCY_MAX_AGE_DAYS, help='Глубина в днях')
+        parser.add_argument('--slice-hours', type=int, default=24, help='Размер среза по датам в часах')
+        parser.add_argument('--roles', default='', help='ID профессиональных ролей HH через запятую')
+        parser.add_argument('--workers', type=int, default=4, help='Число параллельных запросов')
+        parser.add_argument('--checkpoint', default=str(settings.HH_HARVEST_CHECKPOINT), help='Файл чекпоинта')
+        parser.add_argument('--reset', action='store_true', help='Начать заново, игнорируя чекпоинт')
+
+    def handle(self, *args, **options):
+        roles = [role.strip() for role in options['roles'].split(',') if role.strip()]
+        harvester = HHHarvester(
+            days=options['days'],
+            slice_hours=options['slice_hours'],
+            roles=roles,
+            workers=options['workers'],
+            checkpoint_path=options['checkpoint'],
+        )
+        if options['reset']:
+            harvester.reset_checkpoint()
+
+        stats = harvester.run()
+
+        self.stdout.write(
+            f"Срезов: {stats['slices']}, страниц: {stats['pages']}, вакансий: {stats['items']}, "
+            f"сохранено: {stats['stored']}, ошибок: {stats['errors']}, обрезано лимитом HH: {stats['truncated']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Время: {stats['seconds']:.1f} с, пропускная способность: {stats['per_second']:.1f} вак/с"
+        ))
@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from core.analytics import STATE_FIELDS, apply_delta, state_delta
+from core.loadtest import SCENARIOS, SYNTHETIC_PREFIX, FakeUpstream, HttpClient, InProcessClient, run_scenario
+from core.models import Vacancy
+
+
+def _per_kind(value, option):
+    """
+    '0.2' -> одно значение для всех типов; 'list=0.5,detail=0.1' -> по типам
+    """
+    kinds = ('list', 'detail', 'auth', 'student')
+    if not value:
+        return {}
+    try:
+        if '=' not in value:
+            return {kind: float(value) for kind in kinds}
+        result = {}
+        for part in value.split(','):
+            kind, number = part.split('=')
+            if kind.strip() not in kinds:
+                raise ValueError(kind)
+            result[kind.strip()] = float(number)
+        return result
+    except ValueError:
+        raise CommandError(f"Неверное значение {option}: {value}")
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест входа и дашборда на локальных заглушках HH и API университета'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Сценарии через запятую')
+        parser.add_argument('--concurrency', type=int, default=4, help='Параллельных сессий')
+        parser.add_argument('--iterations', type=int, default=5, help='Прогонов сценария на сессию')
+        parser.add_argument('--vacancies', type=int, default=2000, help='Вакансий в заглушке HH')
+        parser.add_argument('--latency-ms', default='', help="Задержка заглушек: '50' или 'list=300,detail=80,auth=50,student=200'")
+        parser.add_argument('--error-rate', default='', help="Доля ошибок 500: '0.05' или 'detail=0.1'")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--port', type=int, default=0, help='Порт заглушек (0 - любой свободный)')
+        parser.add_argument('--serve', action='store_true', help='Только запустить заглушки (для --target или runserver)')
+        parser.add_argument('--target', default='', help='URL запущенного приложения; без него запросы идут в процессе')
+        parser.add_argument('--keep-data', action='store_true', help='Не удалять созданных пользователей и вакансии')
+        parser.add_argument('--allow-db', action='store_true', help='Разрешить запуск в процессе на БД при DEBUG=False')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in scenarios if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(unknown)}")
+
+        in_process = not options['serve'] and not options['target']
+        if in_process and not settings.DEBUG and not options['allow_db']:
+            # Запуск в процессе пишет пользователей и вакансии в настроенную БД и локальный индекс
+            raise CommandError(
+                'Запуск в процессе пишет в настроенную БД: используйте одноразовую БД с DEBUG=True, '
+                '--target для отдельно запущенного приложения или явно --allow-db'
+            )
+
+        latency = {kind: ms / 1000 for kind, ms in _per_kind(options['latency_ms'], '--latency-ms').items()}
+        upstream = FakeUpstream(
+            port=options['port'],
+            vacancies=options['vacancies'],
+            latency=latency,
+            errors=_per_kind(options['error_rate'], '--error-rate'),
+            seed=options['seed'],
+        )
+
+        if options['serve']:
+            self.stdout.write(f"Заглушки запущены на {upstream.base_url}. Переменные окружения для приложения:")
+            for key, value in upstream.settings().items():
+                self.stdout.write(f"  {key}={value}")
+            try:
+                upstream.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        upstream.start()
+        try:
+            if options['target']:
+                results = self._run(scenarios, lambda: HttpClient(options['target']), options)
+            else:
+                # В процессе приложение ходит в заглушки через подмененные настройки
+                with override_settings(ALLOWED_HOSTS=['testserver'], **upstream.settings()):
+                    results = self._run(scenarios, InProcessClient, options)
+        finally:
+            upstream.stop()
+            if in_process and not options['keep_data']:
+                self._cleanup()
+
+        self._report(results)
+
+    def _run(self, scenarios, client_factory, options):
+        results = []
+        for name in scenarios:
+            self.stdout.write(f"▶ {name}: {options['concurrency']} сессий × {options['iterations']}")
+            results.append(run_scenario(name, client_factory, options['concurrency'], options['iterations']))
+        return results
+
+    def _cleanup(self):
+        # Удаляются только строки с префиксом нагрузочного теста
+        User.objects.filter(
+            username__startswith=SYNTHETIC_PREFIX,
+            student_profile__person_id__startswith=SYNTHETIC_PREFIX,
+        ).delete()
+        with transaction.atomic():
+            synthetic = Vacancy.objects.filter(hh_id__startswith=SYNTHETIC_PREFIX)
+            before = {row['hh_id']: row for row in synthetic.select_for_update().values(*STATE_FIELDS)}
+            synthetic.delete()
+            apply_delta(*state_delta(before, {}))
+
+    def _report(self, results):
+        for result in results:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{result['scenario']}: {result['sessions']} сессий за {result['duration_s']:.1f} с, "
+                f"{result['sessions_per_s']:.2f} сессий/с, {result['requests_per_s']:.2f} запросов/с"
+            ))
+            self.stdout.write(f"{'Шаг':<16} {'Запросов':>9} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10} {'Ошибки':>8}")
+            for step, stats in result['steps'].items():
+                line = (
+                    f"{step:<16} {stats['requests']:>9} {stats['p50']:>10.1f} {stats['p95']:>10.1f} "
+                    f"{stats['p99']:>10.1f} {stats['error_rate']:>8.1%}"
+                )
+                if stats['errors']:
+                    line += '  ' + ', '.join(f"{reason}×{count}" for reason, count in stats['errors'].items())
+                    line = self.style.ERROR(line)
+                self.stdout.write(line)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.refresh import VacancyRefresher
+
+
+class Command(BaseCommand):
+    help = 'Инкрементально обновляет локальные вакансии: условные запросы деталей и архивация исчезнувших'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.VACANCY_MAX_AGE_DAYS, help='Глубина в днях')
+        parser.add_argument('--slice-hours', type=int, default=24, help='Размер среза по датам в часах')
+        parser.add_argument('--workers', type=int, default=4, help='Число параллельных запросов')
+        parser.add_argument('--checkpoint', default=str(settings.HH_REFRESH_CHECKPOINT), help='Файл чекпоинта')
+        parser.add_argument('--reset', action='store_true', help='Начать заново, игнорируя чекпоинт')
+
+    def handle(self, *args, **options):
+        refresher = VacancyRefresher(
+            days=options['days'],
+            slice_hours=options['slice_hours'],
+            workers=options['workers'],
+            checkpoint_path=options['checkpoint'],
+        )
+        if options['reset']:
+            refresher.reset_checkpoint()
+
+        stats = refresher.run()
+
+        self.stdout.write(
+            f"Вакансий в поиске: {stats['items']} (новых {stats['new']}, изменившихся {stats['changed']})"
+        )
+        self.stdout.write(
+            f"Загружено деталей: {stats['fetched']}, не изменилось (304): {stats['not_modified']}, "
+            f"переиспользовано без запроса: {stats['reused']}, в архив: {stats['archived']}"
+        )
+        self.stdout.write(
+            f"Ошибок: страниц {stats['errors']}, деталей {stats['detail_errors']}; "
+            f"время {stats['seconds']:.1f} с, {stats['per_second']:.1f} вак/с"
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import rebuild_skill_demand, top_skills, weekly_trend
+
+
+class Command(BaseCommand):
+    help = 'Спрос на навыки по шардам: пересчет агрегатов SkillDemand и топ навыков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Полностью пересчитать агрегаты по вакансиям')
+        parser.add_argument('--shard', default=None, help='Шард специальностей')
+        parser.add_argument('--city', default=None, help='Город')
+        parser.add_argument('--weeks', type=int, default=4, help='Сколько последних недель учитывать')
+        parser.add_argument('--limit', type=int, default=20, help='Сколько навыков показать')
+        parser.add_argument('--trend', default=None, help='Показать понедельную динамику навыка')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.perf_counter()
+            rows = rebuild_skill_demand()
+            self.stdout.write(self.style.SUCCESS(
+                f"Агрегаты пересчитаны: {rows} строк за {(time.perf_counter() - started) * 1000:.0f} мс"
+            ))
+
+        if options['trend']:
+            for week, count in weekly_trend(options['trend'], shard=options['shard'], weeks=options['weeks']):
+                self.stdout.write(f"{week:%Y-%m-%d} {count:>6}")
+            return
+
+        self.stdout.write(f"{'Навык':<40} {'Вакансий':>9}")
+        for _, name, count in top_skills(options['shard'], options['city'], options['weeks'], options['limit']):
+            self.stdout.write(f"{name:<40} {count:>9}")
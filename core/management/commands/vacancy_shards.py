@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.vacancy_index import VacancyIndex
+
+
+class Command(BaseCommand):
+    help = 'Показывает размеры шардов индекса вакансий и время выборки из каждого шарда'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Сколько раз выполнять выборку для замера')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = VacancyIndex.load()
+        load_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(f"Индекс: {index.size} вакансий, версия {index.version}, загрузка {load_ms:.1f} мс")
+        if not index.size:
+            self.stdout.write(self.style.WARNING('Локальное хранилище вакансий пусто'))
+            return
+
+        repeat = max(options['repeat'], 1)
+        self.stdout.write(f"{'Шард':<15} {'Размер':>8} {'Выборка, мс':>12}")
+        for name, size in index.shard_sizes().items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                index.candidates([name])
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            self.stdout.write(f"{name:<15} {size:>8} {elapsed_ms:>12.3f}")
@@ -0,0 +1,132 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы бакетов в секундах: от миллисекунд (векторизация) до десятков секунд (HH API)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Монотонный счетчик в формате Prometheus
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """
+    Гистограмма в формате Prometheus (перцентили считаются на стороне Prometheus
+    через histogram_quantile)
+    """
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(key + (('le', _format_value(bound)),))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                lines.append(f'{self.name}_bucket{_format_labels(key + (("le", "+Inf"),))} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(total)}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+def render():
+    """
+    Все метрики процесса в текстовом формате Prometheus
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+
+# Метрики приложения
+
+STAGE_SECONDS = Histogram(
+    'careerai_stage_duration_seconds',
+    'Длительность этапов построения дашборда и входа',
+)
+HH_REQUESTS = Counter(
+    'careerai_hh_requests_total',
+    'Запросы к HeadHunter API по типу и результату',
+)
+LOGIN_SYNCS = Counter(
+    'careerai_login_sync_total',
+    'Синхронизации данных студента при входе по результату',
+)
+
+
+def stage(name):
+    """
+    Контекстный менеджер для замера этапа: `with stage('vectorize'): ...`
+    """
+    return STAGE_SECONDS.time(stage=name)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vacancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hh_id', models.CharField(max_length=32, unique=True)),
+                ('title', models.CharField(max_length=500)),
+                ('company', models.CharField(blank=True, max_length=500, null=True)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('snippet', models.TextField(blank=True)),
+                ('skills', models.JSONField(blank=True, default=list)),
+                ('salary', models.CharField(blank=True, max_length=100)),
+                ('area_id', models.CharField(blank=True, max_length=20, null=True)),
+                ('city', models.CharField(blank=True, max_length=200, null=True)),
+                ('employment', models.CharField(blank=True, max_length=100)),
+                ('employment_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('experience_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('salary_from', models.IntegerField(blank=True, null=True)),
+                ('salary_to', models.IntegerField(blank=True, null=True)),
+                ('currency', models.CharField(blank=True, max_length=10, null=True)),
+                ('shard', models.CharField(db_index=True, max_length=50)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-published_at'],
+                'indexes': [models.Index(fields=['shard', 'published_at'], name='core_vacanc_shard_e1608f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='detail_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='etag',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='is_archived',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='last_modified',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_vacancy_detail_fetched_at_vacancy_etag_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillDemand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.CharField(max_length=50)),
+                ('city', models.CharField(blank=True, max_length=200)),
+                ('week', models.DateField(help_text='Понедельник недели публикации')),
+                ('skill', models.CharField(help_text='Нормализованное название навыка', max_length=200)),
+                ('name', models.CharField(max_length=200)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-week', '-count'],
+                'indexes': [models.Index(fields=['shard', 'week'], name='core_skilld_shard_50538d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('shard', 'city', 'week', 'skill'), name='unique_skill_demand')],
+            },
+        ),
+    ]
@@ -1,6 +1,9 @@
 import logging
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from django.conf import settings
+
+from .log_handlers import debug_enabled
+from .metrics import stage
+from .skills import SkillGazetteer
 
 logger = logging.getLogger('core')
 
@@ -10,53 +13,52 @@ class VacancyRecommender:
     Рекомендательная система вакансий на основе TF-IDF и Cosine Similarity
     """
     
-    def __init__(self):
-        logger.info("=" * 80)
-        logger.info("VacancyRecommender: Инициализация рекомендательной системы")
+    def __init__(self, gazetteer=None, skill_weight=None):
+        # scikit-learn импортируется только при скоринге: импорт модуля не тянет весь ML-стек
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
         self.vectorizer = TfidfVectorizer(
             max_features=500,
             ngram_range=(1, 2),
             min_df=1
         )
-        logger.info("VacancyRecommender: TfidfVectorizer создан (max_features=500, ngram_range=(1,2))")
+        # Словарь навыков; если не передан, строится из key_skills переданных вакансий
+        self.gazetteer = gazetteer
+        self.skill_weight = skill_weight if skill_weight is not None else getattr(settings, 'SKILL_MATCH_WEIGHT', 0.0)
     
     def _build_student_text(self, student_profile):
         """
         Формируем текстовое представление студента
         """
-        logger.info("-" * 80)
-        logger.info(f"📚 Начинаем сбор данных студента (ID: {student_profile.person_id})")
+        logger.debug("📚 Начинаем сбор данных студента (ID: %s)", student_profile.person_id)
         
         parts = []
         
         # Базовая информация об образовании
         try:
             education = student_profile.education
-            logger.info(f"  ✓ Получаем информацию об образовании...")
             
             if education.profession:
                 parts.append(education.profession)
-                logger.info(f"    - Профессия: {education.profession}")
+                logger.debug("    - Профессия: %s", education.profession)
             
             if education.specialization:
                 parts.append(education.specialization)
-                logger.info(f"    - Специализация: {education.specialization}")
+                logger.debug("    - Специализация: %s", education.specialization)
             
             if education.qualification:
                 parts.append(education.qualification)
-                logger.info(f"    - Квалификация: {education.qualification}")
+                logger.debug("    - Квалификация: %s", education.qualification)
                 
         except Exception as e:
             logger.warning(f"  ✗ Ошибка при получении образования: {e}")
         
         # Предметы (берем только с оценками, без null)
         try:
-            records = student_profile.academic_records.filter(
-                grade__isnull=False
-            ).exclude(grade='')
+            records = self._graded_records(student_profile)
             
-            total_subjects = records.count()
-            logger.info(f"  ✓ Получаем предметы студента (всего с оценками: {total_subjects})")
+            total_subjects = len(records)
+            logger.debug("  ✓ Получаем предметы студента (всего с оценками: %s)", total_subjects)
             
             subjects_by_grade = {'A': [], 'B': [], 'C': [], 'Other': []}
             
@@ -78,40 +80,59 @@ class VacancyRecommender:
                     parts.append(subject)
                     subjects_by_grade['Other'].append(f"{subject} ({grade})")
             
-            # Логируем предметы по категориям
-            if subjects_by_grade['A']:
-                logger.info(f"    - Отличные оценки (вес x3): {', '.join(subjects_by_grade['A'][:5])}{'...' if len(subjects_by_grade['A']) > 5 else ''}")
-            if subjects_by_grade['B']:
-                logger.info(f"    - Хорошие оценки (вес x2): {', '.join(subjects_by_grade['B'][:5])}{'...' if len(subjects_by_grade['B']) > 5 else ''}")
-            if subjects_by_grade['C']:
-                logger.info(f"    - Средние оценки (вес x1): {', '.join(subjects_by_grade['C'][:5])}{'...' if len(subjects_by_grade['C']) > 5 else ''}")
+            # Логируем предметы по категориям (строки собираем только если DEBUG пишется в этом запросе)
+            if debug_enabled(logger):
+                for key, label in (('A', 'Отличные оценки (вес x3)'), ('B', 'Хорошие оценки (вес x2)'), ('C', 'Средние оценки (вес x1)')):
+                    if subjects_by_grade[key]:
+                        logger.debug(
+                            "    - %s: %s%s", label, ', '.join(subjects_by_grade[key][:5]),
+                            '...' if len(subjects_by_grade[key]) > 5 else '',
+                        )
                 
         except Exception as e:
             logger.warning(f"  ✗ Ошибка при получении предметов: {e}")
         
         # Практики
         try:
-            practices = student_profile.practices.all()
-            practice_count = practices.count()
-            logger.info(f"  ✓ Получаем практики студента (всего: {practice_count})")
+            practices = list(student_profile.practices.all())
+            practice_count = len(practices)
+            logger.debug("  ✓ Получаем практики студента (всего: %s)", practice_count)
             
             for practice in practices:
                 if practice.practice_type:
                     parts.append(practice.practice_type)
-                    logger.info(f"    - Практика: {practice.practice_type}")
+                    logger.debug("    - Практика: %s", practice.practice_type)
                 if practice.position:
                     parts.append(practice.position)
-                    logger.info(f"      Должность: {practice.position}")
+                    logger.debug("      Должность: %s", practice.position)
         except Exception as e:
             logger.warning(f"  ✗ Ошибка при получении практик: {e}")
         
         final_text = ' '.join(parts)
-        logger.info(f"  ✓ Итоговый текст студента собран (длина: {len(final_text)} символов, {len(parts)} элементов)")
-        logger.info(f"  📝 Превью текста студента:")
-        logger.info(f"     {final_text}")
+        logger.debug("  ✓ Итоговый текст студента собран (длина: %s символов, %s элементов)", len(final_text), len(parts))
+        logger.debug("  📝 Текст студента: %s", final_text)
         
         return final_text
     
+    def _graded_records(self, student_profile):
+        """
+        Предметы с оценкой. Фильтр в Python, чтобы работал prefetch_related
+        (StudentProfile.objects.with_related()) без повторных запросов
+        """
+        return [record for record in student_profile.academic_records.all() if record.grade]
+    
+    def _student_skill_texts(self, student_profile):
+        """
+        Тексты студента, в которых ищутся навыки: названия предметов и должности на практиках
+        """
+        texts = []
+        try:
+            texts.extend(record.subject_name for record in self._graded_records(student_profile))
+            texts.extend(practice.position for practice in student_profile.practices.all())
+        except Exception as e:
+            logger.warning(f"  ✗ Ошибка при получении текстов для навыков: {e}")
+        return texts
+    
     def _build_vacancy_text(self, vacancy):
         """
         Формируем текстовое представление вакансии
@@ -138,22 +159,63 @@ class VacancyRecommender:
         
         return ' '.join(parts)
     
+    def _similarities(self, student_text, vacancy_texts):
+        """
+        Косинусная близость текста студента к текстам вакансий
+        """
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        # TF-IDF векторизация
+        all_texts = [student_text] + vacancy_texts
+        
+        with stage('vectorize'):
+            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
+        logger.debug("🔢 Матрица TF-IDF (тексты x признаки): %s", tfidf_matrix.shape)
+        
+        # Cosine Similarity
+        student_vector = tfidf_matrix[0:1]
+        vacancy_vectors = tfidf_matrix[1:]
+        
+        with stage('similarity'):
+            return cosine_similarity(student_vector, vacancy_vectors)[0]
+    
+    def _rank(self, student_profile, vacancies, similarities):
+        """
+        Проставляет итоговый скор (TF-IDF + навыки) и сортирует вакансии по нему
+        """
+        # Навыки из словаря key_skills: быстрый объяснимый сигнал, смешиваемый с TF-IDF
+        student_skills = {}
+        gazetteer = None
+        if self.skill_weight > 0:
+            gazetteer = self.gazetteer or SkillGazetteer.from_vacancies(vacancies)
+            student_skills = gazetteer.extract(self._student_skill_texts(student_profile))
+            logger.debug("🧩 Навыки студента из словаря (%s навыков): %s", len(gazetteer), list(student_skills)[:10])
+    
+        for i, vacancy in enumerate(vacancies):
+            score = float(similarities[i])
+            if gazetteer is not None:
+                skill_score, matched_skills = gazetteer.score(student_skills, vacancy)
+                vacancy['skill_score'] = skill_score * 100
+                vacancy['matched_skills'] = matched_skills
+                score = (1 - self.skill_weight) * score + self.skill_weight * skill_score
+            vacancy['similarity_score'] = score * 100
+    
+        # Сортируем по similarity
+        return sorted(
+            vacancies, 
+            key=lambda x: x['similarity_score'], 
+            reverse=True
+        )
+    
     def get_recommendations(self, student_profile, vacancies, top_n=10):
         """
         Получить топ-N рекомендованных вакансий для студента
         """
-        logger.info("=" * 80)
-        logger.info("🎯 ЗАПУСК РЕКОМЕНДАТЕЛЬНОЙ СИСТЕМЫ")
-        logger.info("=" * 80)
-        
         if not vacancies:
             logger.warning("⚠️  Список вакансий пуст! Возвращаем пустой список.")
             return []
         
-        logger.info(f"📊 Входные данные:")
-        logger.info(f"  - Всего вакансий получено: {len(vacancies)}")
-        logger.info(f"  - Нужно вернуть топ: {top_n}")
-        logger.info(f"  - Профиль студента: {'Есть' if student_profile else 'Отсутствует'}")
+        logger.debug("🎯 Рекомендации: вакансий %s, топ-%s", len(vacancies), top_n)
         
         if not student_profile:
             logger.warning("⚠️  Профиль студента не передан. Возвращаем первые 10 вакансий БЕЗ рекомендаций.")
@@ -161,16 +223,14 @@ class VacancyRecommender:
         
         try:
             # Строим текст студента
-            logger.info("")
-            student_text = self._build_student_text(student_profile)
+            with stage('student_text'):
+                student_text = self._build_student_text(student_profile)
             
             if not student_text.strip():
                 logger.error(f"❌ Текст студента пуст! Возвращаем вакансии без рекомендаций.")
                 return vacancies[:top_n]
             
             # Строим тексты вакансий
-            logger.info("-" * 80)
-            logger.info(f"💼 Обрабатываем вакансии...")
             vacancy_texts = []
             
             for idx, vacancy in enumerate(vacancies, 1):
@@ -178,69 +238,31 @@ class VacancyRecommender:
                 vacancy_texts.append(v_text)
                 
                 if idx <= 3:  # Логируем первые 3 вакансии подробно
-                    logger.info(f"  Вакансия #{idx}: {vacancy.get('title', 'Без названия')}")
-                    logger.info(f"    - Компания: {vacancy.get('company', 'Не указана')}")
-                    logger.info(f"    - Навыки: {', '.join(vacancy.get('skills', [])[:5])}{'...' if len(vacancy.get('skills', [])) > 5 else ''}")
-                    logger.info(f"    - Длина текста: {len(v_text)} символов")
+                    logger.debug(
+                        "  Вакансия #%s: %s (%s), навыки: %s, длина текста: %s",
+                        idx, vacancy.get('title', 'Без названия'), vacancy.get('company', 'Не указана'),
+                        vacancy.get('skills', [])[:5], len(v_text),
+                    )
             
-            if len(vacancies) > 3:
-                logger.info(f"  ... и еще {len(vacancies) - 3} вакансий")
+            similarities = self._similarities(student_text, vacancy_texts)
             
-            # TF-IDF векторизация
-            logger.info("-" * 80)
-            logger.info("🔢 Векторизация текстов (TF-IDF)...")
-            all_texts = [student_text] + vacancy_texts
-            logger.info(f"  - Всего текстов для векторизации: {len(all_texts)}")
-            
-            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-            logger.info(f"  ✓ Матрица TF-IDF создана: {tfidf_matrix.shape}")
-            logger.info(f"    (строки=тексты, столбцы=признаки)")
-            
-            # Cosine Similarity
-            logger.info("-" * 80)
-            logger.info("📐 Вычисляем Cosine Similarity...")
-            student_vector = tfidf_matrix[0:1]
-            vacancy_vectors = tfidf_matrix[1:]
-            
-            similarities = cosine_similarity(student_vector, vacancy_vectors)[0]
-            logger.info(f"  ✓ Similarity вычислен для {len(similarities)} вакансий")
-            
-            # Добавляем similarity score к вакансиям
-            logger.info("-" * 80)
-            logger.info("📊 Результаты похожести (Similarity Scores):")
-            
-            for i, vacancy in enumerate(vacancies):
-                score = float(similarities[i])
-                vacancy['similarity_score'] = score * 100
-            
-            # Сортируем по similarity
-            sorted_vacancies = sorted(
-                vacancies, 
-                key=lambda x: x['similarity_score'], 
-                reverse=True
-            )
+            # Добавляем similarity score к вакансиям и сортируем
+            with stage('ranking'):
+                sorted_vacancies = self._rank(student_profile, vacancies, similarities)
             
             # Логируем топ-10 вакансий с их скорами
-            logger.info("")
-            logger.info("🏆 ТОП-10 РЕКОМЕНДОВАННЫХ ВАКАНСИЙ:")
-            for idx, vacancy in enumerate(sorted_vacancies[:10], 1):
-                score = vacancy['similarity_score']
-                title = vacancy.get('title', 'Без названия')
-                company = vacancy.get('company', 'Неизвестно')
-                logger.info(f"  #{idx}. [{score:.4f}] {title} - {company}")
-            
-            logger.info("-" * 80)
-            logger.info(f"✅ Рекомендации успешно сгенерированы для студента {student_profile.person_id}")
-            logger.info(f"   Возвращаем топ-{top_n} вакансий")
-            logger.info("=" * 80)
+            if debug_enabled(logger):
+                for idx, vacancy in enumerate(sorted_vacancies[:10], 1):
+                    logger.debug(
+                        "  🏆 #%s. [%.4f] %s - %s", idx, vacancy['similarity_score'],
+                        vacancy.get('title', 'Без названия'), vacancy.get('company', 'Неизвестно'),
+                    )
             
             return sorted_vacancies[:top_n]
             
         except Exception as e:
-            logger.error("=" * 80)
-            logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА В РЕКОМЕНДАТЕЛЬНОЙ СИСТЕМЕ")
-            logger.error(f"   Тип ошибки: {type(e).__name__}")
-            logger.error(f"   Сообщение: {str(e)}", exc_info=True)
-            logger.error(f"   Возвращаем вакансии БЕЗ рекомендаций")
-            logger.error("=" * 80)
+            logger.error(
+                "❌ Ошибка в рекомендательной системе (%s: %s), возвращаем вакансии БЕЗ рекомендаций",
+                type(e).__name__, e, exc_info=True,
+            )
             return vacancies[:top_n]
\ No newline at end of file
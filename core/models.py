@@ -0,0 +1,100 @@
+from django.db import models
+
+
+class Vacancy(models.Model):
+    """
+    Локальная копия вакансии HH, из которой строится индекс рекомендаций
+    """
+    hh_id = models.CharField(max_length=32, unique=True)
+
+    title = models.CharField(max_length=500)
+    company = models.CharField(max_length=500, blank=True, null=True)
+    url = models.URLField(max_length=500, blank=True)
+    snippet = models.TextField(blank=True)
+    skills = models.JSONField(default=list, blank=True)
+    salary = models.CharField(max_length=100, blank=True)
+
+    # Фасеты
+    area_id = models.CharField(max_length=20, blank=True, null=True)
+    city = models.CharField(max_length=200, blank=True, null=True)
+    employment = models.CharField(max_length=100, blank=True)
+    employment_id = models.CharField(max_length=50, blank=True, null=True)
+    experience_id = models.CharField(max_length=50, blank=True, null=True)
+    salary_from = models.IntegerField(null=True, blank=True)
+    salary_to = models.IntegerField(null=True, blank=True)
+    currency = models.CharField(max_length=10, blank=True, null=True)
+
+    shard = models.CharField(max_length=50, db_index=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    # Инкрементальное обновление
+    fingerprint = models.CharField(max_length=40, blank=True)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    detail_fetched_at = models.DateTimeField(null=True, blank=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    is_archived = models.BooleanField(default=False, db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-published_at']
+        indexes = [
+            models.Index(fields=['shard', 'published_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.hh_id})"
+
+    def as_dict(self):
+        """
+        Словарь того же вида, что строит services._build_vacancy
+        """
+        return {
+            'id': self.hh_id,
+            'title': self.title,
+            'company': self.company,
+            'city': self.city,
+            'salary': self.salary,
+            'url': self.url,
+            'employment': self.employment,
+            'snippet': self.snippet,
+            'skills': list(self.skills or []),
+            'area_id': self.area_id,
+            'employment_id': self.employment_id,
+            'experience_id': self.experience_id,
+            'salary_from': self.salary_from,
+            'salary_to': self.salary_to,
+            'currency': self.currency,
+            'published_at': self.published_at,
+            'shard': self.shard,
+        }
+
+
+class SkillDemand(models.Model):
+    """
+    Материализованный спрос на навык: число активных вакансий с этим key_skill
+    в шарде специальностей, городе и неделе публикации.
+    Поддерживается инкрементально при сохранении и архивации вакансий (core.analytics).
+    """
+    shard = models.CharField(max_length=50)
+    city = models.CharField(max_length=200, blank=True)
+    week = models.DateField(help_text='Понедельник недели публикации')
+    skill = models.CharField(max_length=200, help_text='Нормализованное название навыка')
+    name = models.CharField(max_length=200)
+    count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-week', '-count']
+        constraints = [
+            models.UniqueConstraint(fields=['shard', 'city', 'week', 'skill'], name='unique_skill_demand'),
+        ]
+        indexes = [
+            models.Index(fields=['shard', 'week']),
+        ]
+
+    def __str__(self):
+        return f"{self.name}: {self.count} ({self.shard}, {self.city or '-'}, {self.week})"
@@ -0,0 +1,142 @@
+import cProfile
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger('core')
+
+
+class StackSampler:
+    """
+    Сэмплирующий профайлер одного потока: раз в `interval` секунд снимает стек
+    и копит его в формате collapsed stacks (вход для flamegraph.pl / speedscope)
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельных запросов по требованию.
+
+    Срабатывает для персонала по заголовку `X-Profile: 1` или параметру `?_profile=1`,
+    либо для случайной доли запросов (PROFILING_SAMPLE_RATE), и только для вью
+    из PROFILING_VIEWS. Профиль (pstats или collapsed stacks) пишется в PROFILING_DIR,
+    где хранятся последние PROFILING_KEEP файлов. Без срабатывания запрос проходит
+    без каких-либо дополнительных действий.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.views = set(getattr(settings, 'PROFILING_VIEWS', ()))
+        self.mode = getattr(settings, 'PROFILING_MODE', 'cprofile')
+        self.directory = Path(getattr(settings, 'PROFILING_DIR', 'profiles'))
+        self.keep = getattr(settings, 'PROFILING_KEEP', 100)
+
+    def _requested(self, request):
+        if request.headers.get('X-Profile') != '1' and request.GET.get('_profile') != '1':
+            return False
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def _view_name(self, request):
+        try:
+            return resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+
+    def __call__(self, request):
+        if not (self._requested(request) or (self.sample_rate and random.random() < self.sample_rate)):
+            return self.get_response(request)
+
+        view_name = self._view_name(request)
+        if view_name not in self.views:
+            return self.get_response(request)
+
+        return self._profile(request, view_name)
+
+    def _profile(self, request, view_name):
+        started = time.perf_counter()
+        if self.mode == 'sampling':
+            profiler = StackSampler(threading.get_ident(), getattr(settings, 'PROFILING_INTERVAL', 0.005))
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            extension = 'folded'
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            extension = 'prof'
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{view_name}-{int(elapsed_ms)}ms-{os.getpid()}.{extension}"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / filename
+            if extension == 'prof':
+                profiler.dump_stats(path)
+            else:
+                profiler.dump(path)
+            self._rotate()
+        except OSError as e:
+            logger.warning("Не удалось сохранить профиль запроса: %s", e)
+            return response
+
+        logger.info("profile view=%s path=%s duration_ms=%.1f file=%s", view_name, request.path, elapsed_ms, filename)
+        if self._requested(request):
+            response['X-Profile-File'] = filename
+        return response
+
+    def _rotate(self):
+        files = sorted(
+            (p for p in self.directory.iterdir() if p.suffix in ('.prof', '.folded')),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for path in files[:-self.keep] if self.keep else []:
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,126 @@
+import logging
+from concurrent.futures import as_completed
+
+import requests
+from django.db import transaction
+from django.db.models import Q
+
+from .analytics import STATE_FIELDS, apply_delta, state_delta
+from .harvester import HHHarvester
+from .models import Vacancy
+from .services import _build_vacancy, store_vacancies
+
+logger = logging.getLogger('core')
+
+
+class VacancyRefresher(HHHarvester):
+    """
+    Инкрементальное обновление локального хранилища вакансий.
+
+    Обходит поиск HH так же, как HHHarvester, но детали вакансии загружает только
+    для новых вакансий и вакансий, у которых изменился отпечаток элемента списка.
+    Запрос деталей условный (If-None-Match / If-Modified-Since), поэтому при 304
+    сохраненные key_skills переиспользуются. Вакансии, которые не встретились
+    в поиске за полный проход, помечаются архивными.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats.update({'new': 0, 'changed': 0, 'fetched': 0, 'not_modified': 0, 'reused': 0, 'archived': 0, 'detail_errors': 0})
+
+    def _fetch_detail(self, item, existing):
+        headers = {}
+        if existing is not None and existing.detail_fetched_at:
+            if existing.etag:
+                headers['If-None-Match'] = existing.etag
+            if existing.last_modified:
+                headers['If-Modified-Since'] = existing.last_modified
+
+        response = self._session().get(item['url'], headers=headers, timeout=5)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response.json(), response.headers.get('ETag', ''), response.headers.get('Last-Modified', '')
+
+    def process_items(self, items):
+        ids = [item.get('id') for item in items if item.get('id')]
+        stored = {
+            vacancy.hh_id: vacancy
+            for vacancy in Vacancy.objects.filter(hh_id__in=ids).only(
+                'hh_id', 'fingerprint', 'etag', 'last_modified', 'skills', 'detail_fetched_at'
+            )
+        }
+
+        unchanged = []
+        futures = {}
+        for item in items:
+            vacancy = _build_vacancy(item, [])
+            existing = stored.get(vacancy['id'])
+            if existing is not None and existing.detail_fetched_at and existing.fingerprint == vacancy['fingerprint']:
+                self.stats['reused'] += 1
+                unchanged.append(vacancy)
+                continue
+            if not item.get('url'):
+                unchanged.append(vacancy)
+                continue
+            self.stats['new' if existing is None else 'changed'] += 1
+            futures[self.executor.submit(self._fetch_detail, item, existing)] = (vacancy, existing)
+
+        detailed = []
+        for future in as_completed(futures):
+            vacancy, existing = futures[future]
+            try:
+                result = future.result()
+            except requests.RequestException as e:
+                self.stats['detail_errors'] += 1
+                logger.warning(f"  ⚠️  Вакансия {vacancy['id']}: ошибка загрузки деталей - {e}")
+                # Детали не трогаем - попробуем в следующий раз
+                unchanged.append(vacancy)
+                continue
+
+            if result is None:
+                self.stats['not_modified'] += 1
+                vacancy['skills'] = list(existing.skills or [])
+                vacancy['etag'] = existing.etag
+                vacancy['last_modified'] = existing.last_modified
+            else:
+                details, etag, last_modified = result
+                self.stats['fetched'] += 1
+                vacancy['skills'] = [skill['name'] for skill in details.get('key_skills', [])]
+                vacancy['etag'] = etag
+                vacancy['last_modified'] = last_modified
+            detailed.append(vacancy)
+
+        return (store_vacancies(unchanged, with_details=False)
+                + store_vacancies(detailed, with_details=True))
+
+    def archive_unseen(self):
+        """
+        Помечает архивными вакансии, не встреченные с начала прохода. Учитываются только
+        вакансии из обойденной области и окна публикации: более старые вакансии
+        проход не запрашивал, и их отсутствие в выдаче ничего не значит.
+        """
+        # slices() считает границы в локальном времени процесса
+        window_start = self.window_start().astimezone()
+        unseen = Vacancy.objects.filter(
+            is_archived=False, area_id=self.area, published_at__gte=window_start,
+        ).filter(
+            Q(last_seen_at__lt=self.run_started_at) | Q(last_seen_at__isnull=True)
+        )
+        with transaction.atomic():
+            before = {row['hh_id']: row for row in unseen.select_for_update().values(*STATE_FIELDS)}
+            archived = unseen.update(is_archived=True)
+            # Архивные вакансии перестают учитываться в спросе на навыки
+            apply_delta(*state_delta(before, {}))
+        self.stats['archived'] = archived
+        return archived
+
+    def run(self):
+        stats = super().run()
+        # Архивируем только после полного прохода по всей области без ошибок и без срезов,
+        # обрезанных лимитом HH, иначе неувиденные вакансии могли просто не попасть в выборку
+        if not stats['errors'] and not stats['truncated'] and self.roles == [None]:
+            self.archive_unseen()
+        else:
+            logger.warning("⚠️  Проход неполный - архивация пропущена")
+        return stats
@@ -1,28 +1,52 @@
+import copy
+import hashlib
+import json
 import logging
+import time
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import datetime, timedelta
+from .analytics import apply_delta, state_delta, stored_states
 from .ml_recommender import VacancyRecommender
+from .facets import FacetIndex
+from .models import Vacancy
+from .shards import shard_for_vacancy
+from .metrics import HH_REQUESTS, stage
 
 logger = logging.getLogger('core')
 
 
-def get_hh_vacancies(student_profile=None, per_page=10):
-    logger.info("=" * 80)
-    logger.info("🌐 ЗАПРОС ВАКАНСИЙ ИЗ HeadHunter API")
-    logger.info("=" * 80)
-    
+def _hh_get(url, kind, **kwargs):
+    """
+    GET к HH API с замером длительности и подсчетом результата
+    """
+    try:
+        with stage(f'hh_{kind}'):
+            response = requests.get(url, **kwargs)
+            response.raise_for_status()
+    except requests.RequestException:
+        HH_REQUESTS.inc(kind=kind, outcome='error')
+        raise
+    HH_REQUESTS.inc(kind=kind, outcome='ok')
+    return response
+
+
+def get_hh_vacancies(student_profile=None, per_page=10, filters=None):
+    started = time.perf_counter()
     list_url = settings.HH_API_URL
     date_from = (datetime.now() - timedelta(days=30)).isoformat()
 
-    fetch_count = 100 if student_profile else per_page
+    # HH отдает не больше 100 вакансий на страницу
+    fetch_count = 100 if student_profile else min(per_page, 100)
     
-    logger.info(f"📋 Параметры запроса:")
-    logger.info(f"  - Профиль студента: {'✓ Есть' if student_profile else '✗ Нет'}")
-    logger.info(f"  - Запрашиваем вакансий: {fetch_count}")
-    logger.info(f"  - Нужно вернуть: {per_page}")
-    logger.info(f"  - Регион: Казахстан (area=40)")
-    logger.info(f"  - Период: последние 30 дней (с {date_from[:10]})")
+    logger.debug(
+        "🌐 Запрос вакансий HH: студент=%s, запрашиваем %s, вернуть %s, с %s, фильтры %s",
+        bool(student_profile), fetch_count, per_page, date_from[:10], filters,
+    )
 
     params = {
         'area': '40',
@@ -36,28 +60,20 @@ def get_hh_vacancies(student_profile=None, per_page=10):
         specialization = student_profile.education.specialization
         params['text'] = specialization
         params['experience'] = 'noExperience'
-        logger.info(f"  - Фильтр по специальности: {specialization}")
-        logger.info(f"  - Фильтр опыта: Без опыта")
+        logger.debug("  - Фильтр по специальности: %s, опыт: без опыта", specialization)
 
     headers = {
         'User-Agent': 'CareerAI/1.0'
     }
 
     try:
-        logger.info("-" * 80)
-        logger.info(f"📡 Отправляем запрос к HeadHunter API...")
-        logger.info(f"   URL: {list_url}")
-        
-        list_response = requests.get(list_url, params=params, headers=headers, timeout=10)
-        list_response.raise_for_status()
+        list_response = _hh_get(list_url, 'list', params=params, headers=headers, timeout=10)
         
         items = list_response.json().get('items', [])
-        logger.info(f"✅ Получен ответ от HH API")
-        logger.info(f"   HTTP Status: {list_response.status_code}")
-        logger.info(f"   Вакансий в ответе: {len(items)}")
+        logger.debug("✅ Ответ HH API: статус %s, вакансий %s", list_response.status_code, len(items))
         
         if student_profile and len(items) < 10:
-            logger.warning(f"⚠️  Мало вакансий ({len(items)}). Делаем запрос без фильтра по специальности...")
+            logger.debug("⚠️  Мало вакансий (%s). Делаем запрос без фильтра по специальности...", len(items))
             
             params_fallback = {
                 'area': '40',
@@ -68,8 +84,7 @@ def get_hh_vacancies(student_profile=None, per_page=10):
                 'order_by': 'publication_time'
             }
             
-            fallback_response = requests.get(list_url, params=params_fallback, headers=headers, timeout=10)
-            fallback_response.raise_for_status()
+            fallback_response = _hh_get(list_url, 'list', params=params_fallback, headers=headers, timeout=10)
             fallback_items = fallback_response.json().get('items', [])
             
             existing_ids = {item.get('id') for item in items}
@@ -79,93 +94,337 @@ def get_hh_vacancies(student_profile=None, per_page=10):
                     if len(items) >= 50:
                         break
             
-            logger.info(f"  ✓ Добавлено вакансий: {len(items) - len(existing_ids)}")
+            logger.debug("  ✓ Добавлено вакансий: %s", len(items) - len(existing_ids))
+        
+        if filters:
+            # Фасеты есть уже в элементах списка, поэтому фильтруем ДО загрузки
+            # деталей и скоринга - лишние вакансии не грузятся и не векторизуются
+            mask = FacetIndex([_build_vacancy(item, []) for item in items]).mask(filters)
+            items = [item for item, keep in zip(items, mask) if keep]
+            logger.debug("🔎 После фасетных фильтров осталось вакансий: %s", len(items))
         
         vacancies = []
-
-        logger.info("-" * 80)
-        logger.info(f"🔍 Загружаем детали вакансий (навыки, описание)...")
+        # Вакансии, детали которых не загрузились: их навыки и отпечаток в хранилище не трогаем
+        without_details = set()
         
         for idx, item in enumerate(items, 1):
             detail_url = item.get('url')
             if not detail_url:
-                logger.warning(f"  ⚠️  Вакансия #{idx}: URL отсутствует, пропускаем")
+                logger.debug("  ⚠️  Вакансия #%s: URL отсутствует, пропускаем", idx)
                 continue
 
             try:
-                detail_response = requests.get(detail_url, headers=headers, timeout=5)
-                detail_response.raise_for_status()
+                detail_response = _hh_get(detail_url, 'detail', headers=headers, timeout=5)
                 item_details = detail_response.json()
+                validators = {
+                    'etag': detail_response.headers.get('ETag', ''),
+                    'last_modified': detail_response.headers.get('Last-Modified', ''),
+                }
                 
                 key_skills_list = []
                 for skill in item_details.get('key_skills', []):
                     key_skills_list.append(skill['name'])
                 
                 if idx <= 3:
-                    logger.info(f"  ✓ Вакансия #{idx}: {item.get('name', 'Без названия')}")
-                    logger.info(f"      Навыки: {', '.join(key_skills_list) if key_skills_list else 'не указаны'}")
+                    logger.debug("  ✓ Вакансия #%s: %s, навыки: %s", idx, item.get('name', 'Без названия'), key_skills_list)
 
             except requests.RequestException as e:
-                logger.warning(f"  ⚠️  Вакансия #{idx}: Ошибка загрузки деталей - {e}")
+                logger.warning("  ⚠️  Вакансия %s: ошибка загрузки деталей - %s", item.get('id'), e)
+                without_details.add(item.get('id'))
                 key_skills_list = []
+                validators = {}
             
-            salary = item.get('salary')
-            salary_display = "Не указана"
-            if salary:
-                salary_from = salary.get('from')
-                salary_to = salary.get('to')
-                currency = salary.get('currency', '').upper()
-                
-                if salary_from and salary_to:
-                    salary_display = f"{salary_from:,} - {salary_to:,} {currency}".replace(',', ' ')
-                elif salary_from:
-                    salary_display = f"от {salary_from:,} {currency}".replace(',', ' ')
-                elif salary_to:
-                    salary_display = f"до {salary_to:,} {currency}".replace(',', ' ')
-
-            vacancies.append({
-                'id': item.get('id'),
-                'title': item.get('name'),
-                'company': item.get('employer', {}).get('name'),
-                'city': item.get('area', {}).get('name'),
-                'salary': salary_display,
-                'url': item.get('alternate_url'),
-                'employment': item.get('employment', {}).get('name', 'Не указано'),
-                'snippet': item.get('snippet', {}).get('requirement') or "Нет описания.",
-                'skills': key_skills_list,
-            })
-        
-        if len(items) > 3:
-            logger.info(f"  ... и еще {len(items) - 3} вакансий загружено")
+            vacancies.append({**_build_vacancy(item, key_skills_list), **validators})
         
-        logger.info(f"✅ Всего собрано вакансий: {len(vacancies)}")
+        if getattr(settings, 'HH_STORE_ON_REQUEST', False):
+            _store_fetched(vacancies, without_details)
         
         if student_profile and vacancies:
-            logger.info("-" * 80)
-            logger.info(f"🤖 Студент авторизован! Запускаем ML рекомендации...")
-            logger.info(f"   Student ID: {student_profile.person_id}")
-            logger.info(f"   Специальность: {student_profile.education.specialization if hasattr(student_profile, 'education') else 'Неизвестно'}")
-            
             recommender = VacancyRecommender()
             vacancies = recommender.get_recommendations(
                 student_profile=student_profile,
                 vacancies=vacancies,
                 top_n=per_page
             )
-            logger.info(f"✅ ML рекомендации применены успешно")
         else:
-            logger.info("-" * 80)
-            if not student_profile:
-                logger.info(f"ℹ️  Студент НЕ авторизован - возвращаем первые {per_page} вакансий БЕЗ рекомендаций")
             vacancies = vacancies[:per_page]
         
-        logger.info("=" * 80)    
+        logger.info(
+            "hh_vacancies student=%s fetched=%s detail_errors=%s returned=%s duration_ms=%.1f",
+            student_profile.person_id if student_profile else '-', len(items), len(without_details),
+            len(vacancies), (time.perf_counter() - started) * 1000,
+        )
         return vacancies
 
     except requests.RequestException as e:
-        logger.error("=" * 80)
-        logger.error(f"❌ ОШИБКА при запросе к HH API")
-        logger.error(f"   Тип: {type(e).__name__}")
-        logger.error(f"   Сообщение: {str(e)}", exc_info=True)
-        logger.error("=" * 80)
-        return []
\ No newline at end of file
+        logger.error("❌ Ошибка при запросе к HH API (%s: %s)", type(e).__name__, e, exc_info=True)
+        return []
+
+
+def _store_fetched(vacancies, without_details):
+    """
+    Сохраняет вакансии, полученные в запросе к HH, в локальное хранилище.
+    Вакансии с незагруженными деталями сохраняются как элементы списка
+    (with_details=False), чтобы refresh загрузил их детали позже.
+    """
+    try:
+        store_vacancies([v for v in vacancies if v['id'] not in without_details], with_details=True)
+        store_vacancies([v for v in vacancies if v['id'] in without_details], with_details=False)
+    except DatabaseError as e:
+        # Локальное хранилище - побочный результат запроса, выдачу оно не блокирует
+        logger.warning(f"⚠️  Не удалось сохранить вакансии в локальное хранилище: {e}")
+
+
+def get_recommended_vacancies(student_profile=None, per_page=10, filters=None):
+    """
+    Вакансии для дашборда: из локального шардированного индекса, если он включен
+    и заполнен, иначе напрямую из HH API
+    """
+    if getattr(settings, 'VACANCY_INDEX_ENABLED', False):
+        from .vacancy_index import get_vacancy_index
+
+        index = get_vacancy_index()
+        if index.size:
+            started = time.perf_counter()
+            vacancies = index.search(student_profile=student_profile, filters=filters, top_n=per_page)
+            logger.info(
+                "index_vacancies student=%s index_size=%s returned=%s duration_ms=%.1f",
+                student_profile.person_id if student_profile else '-', index.size,
+                len(vacancies), (time.perf_counter() - started) * 1000,
+            )
+            return vacancies
+        logger.warning("⚠️  Локальный индекс вакансий пуст, запрашиваем HH API")
+
+    return get_hh_vacancies(student_profile=student_profile, per_page=per_page, filters=filters)
+
+
+def _local_index():
+    """
+    Локальный индекс вакансий или None, если вакансии берутся из HH API
+    """
+    if getattr(settings, 'VACANCY_INDEX_ENABLED', False):
+        from .vacancy_index import get_vacancy_index
+
+        index = get_vacancy_index()
+        if index.size:
+            return index
+    return None
+
+
+def ranking_version(student_profile=None, filters=None):
+    """
+    Версия ранжирования без его вычисления: (key, last_modified, versioned).
+
+    Ключ зависит от версии данных студента (updated_at), фильтров и версии индекса,
+    last_modified - самое позднее из времени обновления профиля и вакансий индекса.
+    versioned=False, если вакансии берутся из HH API: версии у них нет, и ключ
+    описывает ранжирование только пока оно лежит в кэше.
+    """
+    index = _local_index()
+    student_version = f"{student_profile.pk}:{student_profile.updated_at.isoformat()}" if student_profile else 'guest'
+    raw_key = json.dumps(
+        [student_version, filters or {}, index.version if index else None],
+        sort_keys=True, ensure_ascii=False,
+    )
+    key = hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+    modified = [
+        value for value in (
+            student_profile.updated_at if student_profile else None,
+            index.updated_at if index else None,
+        )
+        if value is not None
+    ]
+    return key, max(modified) if modified else None, index is not None
+
+
+def get_stored_ranking(student_profile=None, filters=None, version=None):
+    """
+    Полное ранжирование для студента (до RECOMMENDATIONS_API_MAX вакансий), сохраненное в кэше
+    под ключом ranking_version(). Любое изменение данных студента, фильтров или индекса
+    дает новое ранжирование, а старое доживает до TTL и по нему можно дочитать
+    начатую пагинацию.
+    """
+    key, last_modified, _ = version or ranking_version(student_profile, filters)
+
+    ranking = get_ranking_by_key(key)
+    if ranking is None:
+        vacancies = get_recommended_vacancies(
+            student_profile=student_profile,
+            per_page=getattr(settings, 'RECOMMENDATIONS_API_MAX', 200),
+            filters=filters,
+        )
+        ranking = {
+            'key': key,
+            'student_id': student_profile.pk if student_profile else None,
+            'last_modified': last_modified,
+            'vacancies': vacancies,
+        }
+        # Пустой результат (например, HH недоступен) не кэшируем
+        if vacancies:
+            cache.set(f"ranking:{key}", ranking, getattr(settings, 'RECOMMENDATIONS_CACHE_TTL', 600))
+    return ranking
+
+
+def get_ranking_by_key(key):
+    return cache.get(f"ranking:{key}")
+
+
+def store_vacancies(vacancies, with_details=True):
+    """
+    Сохраняет (upsert) вакансии в локальное хранилище с разбивкой по шардам.
+    with_details=False - вакансии из списка поиска без key_skills: навыки уже
+    сохраненных вакансий не перезаписываются. Отпечаток тоже пишется только вместе
+    с деталями, иначе refresh не заметит изменение и не загрузит их заново.
+    Все сохраненные вакансии считаются увиденными сейчас и снимаются с архива.
+    """
+    fields = [
+        'title', 'company', 'url', 'snippet', 'salary', 'area_id', 'city',
+        'employment', 'employment_id', 'experience_id', 'salary_from', 'salary_to',
+        'currency', 'published_at', 'last_seen_at', 'is_archived', 'updated_at',
+    ]
+    if with_details:
+        fields += ['skills', 'shard', 'fingerprint', 'etag', 'last_modified', 'detail_fetched_at']
+
+    now = timezone.now()
+    objects = []
+    for vacancy in vacancies:
+        if not vacancy.get('id'):
+            continue
+        objects.append(Vacancy(
+            hh_id=vacancy['id'],
+            title=vacancy.get('title') or '',
+            company=vacancy.get('company'),
+            url=vacancy.get('url') or '',
+            snippet=vacancy.get('snippet') or '',
+            skills=vacancy.get('skills') or [],
+            salary=vacancy.get('salary') or '',
+            area_id=vacancy.get('area_id'),
+            city=vacancy.get('city'),
+            employment=vacancy.get('employment') or '',
+            employment_id=vacancy.get('employment_id'),
+            experience_id=vacancy.get('experience_id'),
+            salary_from=vacancy.get('salary_from'),
+            salary_to=vacancy.get('salary_to'),
+            currency=vacancy.get('currency'),
+            shard=shard_for_vacancy(vacancy),
+            published_at=vacancy.get('published_at'),
+            fingerprint=vacancy.get('fingerprint') or '',
+            etag=vacancy.get('etag') or '',
+            last_modified=vacancy.get('last_modified') or '',
+            detail_fetched_at=now if with_details else None,
+            last_seen_at=now,
+            is_archived=False,
+        ))
+
+    if not objects:
+        return 0
+
+    ids = [obj.hh_id for obj in objects]
+    # Чтение прежнего состояния, upsert и изменение SkillDemand - одна транзакция
+    # под блокировкой строк вакансий, иначе два параллельных писателя учтут
+    # одну и ту же вакансию дважды
+    with transaction.atomic():
+        before = stored_states(ids, lock=True)
+        missing = [obj for obj in objects if obj.hh_id not in before]
+        if missing:
+            # Новые вакансии сначала вставляются архивными (без вклада в спрос) и блокируются;
+            # параллельная вставка того же hh_id ждет коммита и видит уже сохраненную строку
+            placeholders = []
+            for obj in missing:
+                placeholder = copy.copy(obj)
+                placeholder.is_archived = True
+                placeholders.append(placeholder)
+            Vacancy.objects.bulk_create(placeholders, ignore_conflicts=True)
+            before.update(stored_states([obj.hh_id for obj in missing], lock=True))
+
+        Vacancy.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['hh_id'],
+            update_fields=fields,
+        )
+        _update_skill_demand(objects, before, with_details)
+    return len(objects)
+
+
+def _update_skill_demand(objects, before, with_details):
+    """
+    Пересчитывает SkillDemand только на разницу вкладов сохраненных вакансий
+    """
+    after = {}
+    for obj in objects:
+        old = before.get(obj.hh_id)
+        # Без деталей навыки и шард уже сохраненной вакансии не перезаписываются
+        keep_old = old is not None and not with_details
+        after[obj.hh_id] = {
+            'shard': old['shard'] if keep_old else obj.shard,
+            'skills': old['skills'] if keep_old else obj.skills,
+            'city': obj.city,
+            'published_at': obj.published_at,
+            'is_archived': False,
+        }
+    apply_delta(*state_delta(before, after))
+
+
+def _format_salary(salary):
+    if not salary:
+        return "Не указана"
+
+    salary_from = salary.get('from')
+    salary_to = salary.get('to')
+    currency = (salary.get('currency') or '').upper()
+
+    if salary_from and salary_to:
+        return f"{salary_from:,} - {salary_to:,} {currency}".replace(',', ' ')
+    elif salary_from:
+        return f"от {salary_from:,} {currency}".replace(',', ' ')
+    elif salary_to:
+        return f"до {salary_to:,} {currency}".replace(',', ' ')
+    return "Не указана"
+
+
+def _build_vacancy(item, key_skills_list):
+    """
+    Преобразует вакансию HH в словарь для рекомендаций и шаблона.
+    Помимо отображаемых полей сохраняет сырые фасеты для фильтрации.
+    """
+    salary = item.get('salary') or {}
+    area = item.get('area') or {}
+    employment = item.get('employment') or {}
+    experience = item.get('experience') or {}
+
+    return {
+        'id': item.get('id'),
+        'title': item.get('name'),
+        'company': (item.get('employer') or {}).get('name'),
+        'city': area.get('name'),
+        'salary': _format_salary(salary),
+        'url': item.get('alternate_url'),
+        'employment': employment.get('name', 'Не указано'),
+        'snippet': (item.get('snippet') or {}).get('requirement') or "Нет описания.",
+        'skills': key_skills_list,
+        # Фасеты
+        'area_id': area.get('id'),
+        'employment_id': employment.get('id'),
+        'experience_id': experience.get('id'),
+        'salary_from': salary.get('from'),
+        'salary_to': salary.get('to'),
+        'currency': (salary.get('currency') or '').upper() or None,
+        'published_at': parse_datetime(item.get('published_at') or ''),
+        'fingerprint': vacancy_fingerprint(item),
+    }
+
+
+# Поля элемента списка HH, изменение которых требует перезагрузки деталей
+FINGERPRINT_FIELDS = ('name', 'salary', 'area', 'employment', 'experience', 'snippet', 'employer', 'published_at', 'archived')
+
+
+def vacancy_fingerprint(item):
+    """
+    Отпечаток элемента списка поиска HH (без счетчиков и прочих изменчивых полей)
+    """
+    payload = {field: item.get(field) for field in FINGERPRINT_FIELDS}
+    if isinstance(payload.get('employer'), dict):
+        payload['employer'] = payload['employer'].get('id') or payload['employer'].get('name')
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
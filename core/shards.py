@@ -0,0 +1,51 @@
+import re
+from django.conf import settings
+
+GLOBAL_SHARD = 'global'
+
+# Семейства специальностей: шард -> префиксы слов в специальности/вакансии
+SHARD_FAMILIES = {
+    'it': ['информац', 'программ', 'компьютер', 'вычислит', 'it', 'разработ', 'кибер', 'web', 'веб',
+           'python', 'java', 'sql', 'developer', 'данных', 'системн', 'devops', 'тестиров'],
+    'engineering': ['инженер', 'машин', 'строит', 'энерг', 'электр', 'транспорт', 'механ',
+                    'технолог', 'автоматиз', 'монтаж', 'сварщ', 'геодез'],
+    'economics': ['эконом', 'финанс', 'учет', 'учёт', 'бухгалт', 'аудит', 'менеджмент',
+                  'маркетинг', 'бизнес', 'логист', 'продаж', 'банк', 'кассир'],
+    'education': ['педагог', 'учител', 'образован', 'преподава', 'воспита', 'психолог', 'тренер'],
+    'agro': ['агро', 'ветеринар', 'сельск', 'зоотех', 'растени', 'пищев', 'лесн', 'фермер', 'перераб'],
+    'law': ['прав', 'юрис', 'юрид', 'нотари'],
+    'health': ['медиц', 'фарма', 'биолог', 'химик', 'химия', 'эколог', 'лаборант'],
+    'humanities': ['филолог', 'перевод', 'журнал', 'истор', 'туризм', 'дизайн', 'казахск', 'английск'],
+}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_shard_families():
+    return getattr(settings, 'VACANCY_SHARD_FAMILIES', SHARD_FAMILIES)
+
+
+def _match_families(text):
+    words = _WORD_RE.findall((text or '').lower())
+    matched = []
+    for shard, prefixes in get_shard_families().items():
+        if any(word.startswith(prefix) for word in words for prefix in prefixes):
+            matched.append(shard)
+    return matched
+
+
+def shards_for_specialization(specialization):
+    """
+    Шарды, релевантные специальности студента (EducationInfo.specialization).
+    Пустой список означает, что специальность не распознана и сканировать нужно весь индекс.
+    """
+    return _match_families(specialization)
+
+
+def shard_for_vacancy(vacancy):
+    """
+    Шард вакансии: первое семейство, совпавшее по названию и навыкам, иначе глобальный шард
+    """
+    text = ' '.join([vacancy.get('title') or ''] + list(vacancy.get('skills') or []))
+    matched = _match_families(text)
+    return matched[0] if matched else GLOBAL_SHARD
@@ -0,0 +1,123 @@
+import re
+from collections import Counter, deque
+
+MIN_SKILL_LENGTH = 2
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_skill(text):
+    return _SPACES_RE.sub(' ', (text or '').strip().lower())
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик: поиск всех словарных строк в тексте за один линейный проход
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self._built = False
+
+    def add(self, pattern, value):
+        node = 0
+        for char in pattern:
+            child = self.goto[node].get(char)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][char] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = child
+        self.output[node].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+        self._built = True
+
+    def iter(self, text):
+        """
+        Генерирует (start, end, value) для каждого вхождения
+        """
+        if not self._built:
+            self.build()
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in output[node]:
+                yield i - length + 1, i + 1, value
+
+
+class SkillGazetteer:
+    """
+    Словарь навыков из key_skills вакансий HH, скомпилированный в автомат Ахо-Корасик.
+    Находит навыки в названиях предметов и должностях практик студента целыми словами.
+    """
+
+    def __init__(self, skills=()):
+        self.automaton = AhoCorasick()
+        self.names = {}
+        for name in skills:
+            key = normalize_skill(name)
+            if len(key) < MIN_SKILL_LENGTH or key in self.names:
+                continue
+            self.names[key] = name.strip()
+            self.automaton.add(key, key)
+        self.automaton.build()
+
+    @classmethod
+    def from_vacancies(cls, vacancies):
+        return cls(skill for vacancy in vacancies for skill in vacancy.get('skills') or [])
+
+    def __len__(self):
+        return len(self.names)
+
+    def extract(self, texts):
+        """
+        Навыки, найденные в текстах, с числом вхождений.
+        Тексты склеиваются через перевод строки, и автомат проходит их один раз.
+        """
+        text = '\n'.join(normalize_skill(t) for t in texts if t)
+        found = Counter()
+        for start, end, key in self.automaton.iter(text):
+            # Только целые слова: "java" не должен находиться внутри "javascript"
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            found[key] += 1
+        return found
+
+    @staticmethod
+    def vacancy_skills(vacancy):
+        return {normalize_skill(skill) for skill in vacancy.get('skills') or []}
+
+    def score(self, student_skills, vacancy):
+        """
+        Доля навыков вакансии, найденных у студента, и сами совпавшие навыки
+        """
+        vacancy_skills = self.vacancy_skills(vacancy)
+        if not vacancy_skills:
+            return 0.0, []
+        matched_keys = vacancy_skills & set(student_skills)
+        matched = [skill for skill in vacancy.get('skills') or [] if normalize_skill(skill) in matched_keys]
+        return len(matched_keys) / len(vacancy_skills), matched
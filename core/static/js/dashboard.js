@@ -0,0 +1,23 @@
+// Отложенная загрузка карточек рекомендаций дашборда (core.views.recommendations_fragment)
+(function () {
+    var container = document.getElementById('recommendations');
+    if (!container) {
+        return;
+    }
+    fetch(container.dataset.src, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.text();
+        })
+        .then(function (html) {
+            container.innerHTML = html;
+        })
+        .catch(function () {
+            container.innerHTML = '<p class="text-center text-gray-600 py-10">Не удалось загрузить вакансии. Попробуйте обновить страницу позже.</p>';
+        })
+        .finally(function () {
+            container.removeAttribute('aria-busy');
+        });
+})();
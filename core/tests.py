@@ -0,0 +1,432 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import AcademicRecord, EducationInfo, StudentProfile
+from . import log_handlers, vacancy_index, views
+from .harvester import HHHarvester
+from .facets import FacetIndex, parse_filters
+from .benchmarks import create_synthetic_student, synthetic_hh_items, synthetic_vacancies
+from .ml_recommender import VacancyRecommender
+from .analytics import rebuild_skill_demand, skill_gaps
+from .evaluation import REFERENCE, evaluate
+from .models import SkillDemand, Vacancy
+from .refresh import VacancyRefresher
+from .skills import normalize_skill
+from .services import _build_vacancy, _store_fetched, ranking_version, store_vacancies
+
+# Шаблоны используют {% static %}: в тестах манифест collectstatic не нужен
+TEST_STORAGES = dict(settings.STORAGES, staticfiles={'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'})
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class QueryCountTests(TestCase):
+    """
+    Число запросов не должно зависеть от количества оценок и практик студента (N+1)
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_student_text_uses_prefetched_relations(self):
+        for i in range(3):
+            create_synthetic_student(i, records=10 + i * 20, practices=i)
+
+        recommender = VacancyRecommender()
+        with self.assertNumQueries(3):
+            profiles = list(StudentProfile.objects.with_related())
+            for profile in profiles:
+                self.assertTrue(recommender._build_student_text(profile))
+                recommender._student_skill_texts(profile)
+
+    @override_settings(VACANCY_INDEX_ENABLED=True, VACANCY_INDEX_TTL=3600, DASHBOARD_DEFERRED=False)
+    def test_dashboard_queries_do_not_depend_on_records(self):
+        store_vacancies(synthetic_vacancies(30))
+        vacancy_index._index = None
+        vacancy_index.get_vacancy_index()
+        self.addCleanup(setattr, vacancy_index, '_index', None)
+
+        for records in (5, 80):
+            profile = create_synthetic_student(records, records=records, practices=2)
+            self.client.force_login(profile.user)
+            # Пользователь, профиль с образованием, оценки, практики
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse('index'))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['recommendations'])
+
+
+class RefreshTests(TestCase):
+
+    def setUp(self):
+        self.refresher = VacancyRefresher()
+        self.refresher.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.refresher.executor.shutdown)
+
+    def _process(self, items, detail=None, error=None):
+        side_effect = error or (lambda item, existing: (detail or {'key_skills': [{'name': 'Python'}]}, '"v1"', ''))
+        with mock.patch.object(VacancyRefresher, '_fetch_detail', side_effect=side_effect):
+            self.refresher.process_items(items)
+
+    def test_failed_detail_fetch_is_retried(self):
+        item = synthetic_hh_items(1)[0]
+        self._process([item])
+        stored = Vacancy.objects.get(hh_id=item['id'])
+
+        item['name'] = 'Новое название'
+        self._process([item], error=requests.ConnectionError('timeout'))
+        vacancy = Vacancy.objects.get(hh_id=item['id'])
+        self.assertEqual(vacancy.title, 'Новое название')
+        # Отпечаток без деталей не обновляется - изменение остается заметным
+        self.assertEqual(vacancy.fingerprint, stored.fingerprint)
+
+        self._process([item], detail={'key_skills': [{'name': 'Django'}]})
+        self.assertEqual(self.refresher.stats['changed'], 2)
+        self.assertEqual(Vacancy.objects.get(hh_id=item['id']).skills, ['Django'])
+
+    def test_request_path_keeps_details_of_failed_fetch(self):
+        item = synthetic_hh_items(1)[0]
+        self._process([item])
+        stored = Vacancy.objects.get(hh_id=item['id'])
+
+        # Дашборд не смог загрузить детали: вакансия сохраняется как элемент списка
+        _store_fetched([_build_vacancy(item, [])], {item['id']})
+        vacancy = Vacancy.objects.get(hh_id=item['id'])
+        self.assertEqual(vacancy.skills, ['Python'])
+        self.assertEqual(vacancy.detail_fetched_at, stored.detail_fetched_at)
+        self.assertTrue(SkillDemand.objects.filter(skill=normalize_skill('Python')).exists())
+
+
+class HarvesterTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = Path(directory.name) / 'checkpoint.json'
+        self.items = synthetic_hh_items(4)
+
+    def _pages(self, failing_page=None, found=4):
+        def fetch(date_from, date_to, role, page):
+            if page == failing_page:
+                raise requests.ConnectionError('timeout')
+            return {'found': found, 'pages': 2, 'items': self.items[page * 2:page * 2 + 2]}
+        return fetch
+
+    def _run(self, harvester, fetch):
+        with mock.patch.object(harvester, '_fetch_page', side_effect=fetch):
+            return harvester.run()
+
+    def test_slice_with_failed_page_is_retried(self):
+        harvester = HHHarvester(days=1, workers=2, checkpoint_path=self.checkpoint)
+        slices = len(list(harvester.slices()))
+        stats = self._run(harvester, self._pages(failing_page=1))
+        self.assertEqual(stats['errors'], slices)
+        self.assertEqual(harvester._load_checkpoint().get('done'), [])
+
+        harvester = HHHarvester(days=1, workers=2, checkpoint_path=self.checkpoint)
+        stats = self._run(harvester, self._pages())
+        self.assertEqual((stats['errors'], stats['slices']), (0, slices))
+        self.assertEqual(Vacancy.objects.count(), 4)
+
+    def test_truncated_slice_skips_archiving(self):
+        Vacancy.objects.create(
+            hh_id='old', title='Не встреченная в поиске', area_id='40', published_at=timezone.now(), last_seen_at=None,
+        )
+        refresher = VacancyRefresher(days=1, workers=2, checkpoint_path=self.checkpoint)
+        refresher.MIN_SLICE = timedelta(days=30)
+        with mock.patch.object(VacancyRefresher, 'process_items', return_value=0):
+            stats = self._run(refresher, self._pages(found=HHHarvester.MAX_DEPTH + 1))
+        self.assertEqual(stats['errors'], 0)
+        self.assertTrue(stats['truncated'])
+        self.assertFalse(Vacancy.objects.get(hh_id='old').is_archived)
+
+    def test_partial_window_archives_only_scanned_vacancies(self):
+        now = timezone.now()
+        for hh_id, area_id, age in [('recent', '40', 2), ('older', '40', 10), ('other-area', '1', 2)]:
+            Vacancy.objects.create(
+                hh_id=hh_id, title=hh_id, area_id=area_id, published_at=now - timedelta(days=age), last_seen_at=None,
+            )
+        refresher = VacancyRefresher(days=7, slice_hours=24 * 8, workers=2, checkpoint_path=self.checkpoint)
+        with mock.patch.object(VacancyRefresher, 'process_items', return_value=0):
+            stats = self._run(refresher, lambda *args: {'found': 0, 'pages': 0, 'items': []})
+        self.assertEqual(stats['archived'], 1)
+        archived = set(Vacancy.objects.filter(is_archived=True).values_list('hh_id', flat=True))
+        self.assertEqual(archived, {'recent'})
+
+
+class LoadtestCommandTests(TestCase):
+
+    @override_settings(DEBUG=False)
+    def test_in_process_run_refused_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', iterations=1, concurrency=1)
+        self.assertFalse(Vacancy.objects.exists())
+
+
+class LoggingTests(TestCase):
+
+    @override_settings(LOG_LEVEL='INFO')
+    def test_debug_passes_only_for_sampled_requests(self):
+        logger = logging.getLogger('core')
+        debug_filter = next(f for f in logger.filters if isinstance(f, log_handlers.SampledDebugFilter))
+
+        def record(level):
+            return logging.LogRecord('core', level, __file__, 0, 'message', None, None)
+
+        with mock.patch.object(logger, 'level', logging.DEBUG):
+            logger._cache.clear()
+            self.assertFalse(debug_filter.filter(record(logging.DEBUG)))
+            self.assertTrue(debug_filter.filter(record(logging.INFO)))
+            self.assertFalse(log_handlers.debug_enabled(logger))
+            token = log_handlers._debug_sampled.set(True)
+            try:
+                self.assertTrue(debug_filter.filter(record(logging.DEBUG)))
+                self.assertTrue(log_handlers.debug_enabled(logger))
+            finally:
+                log_handlers._debug_sampled.reset(token)
+        logger._cache.clear()
+
+    @mock.patch.object(os, 'register_at_fork', create=True)
+    def test_forked_child_starts_own_listener(self, register_at_fork):
+        if not hasattr(os, 'fork'):
+            self.skipTest('fork недоступен')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'log.txt'
+        target = logging.FileHandler(path, encoding='utf-8')
+        self.addCleanup(target.close)
+        handler = log_handlers.ProcessQueueHandler([target])
+
+        def record(message):
+            return logging.LogRecord('core', logging.INFO, __file__, 0, message, None, None)
+
+        handler.handle(record('parent'))
+        parent_listener = handler.listener
+        pid = os.fork()
+        if pid == 0:
+            handler.handle(record('child'))
+            child_listener = handler.listener
+            handler.stop_listener()
+            os._exit(0 if child_listener is not parent_listener else 1)
+        _, status = os.waitpid(pid, 0)
+        handler.stop_listener()
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(sorted(path.read_text(encoding='utf-8').split()), ['child', 'parent'])
+
+
+@override_settings(VACANCY_INDEX_ENABLED=True, VACANCY_INDEX_TTL=3600)
+class RecommendationsApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        store_vacancies(synthetic_vacancies(30))
+        vacancy_index._index = None
+        self.addCleanup(setattr, vacancy_index, '_index', None)
+        self.profile = create_synthetic_student(0, records=20)
+        self.client.force_login(self.profile.user)
+        self.url = reverse('recommendations_api')
+
+    def test_etag_depends_on_data_version_only(self):
+        first = self.client.get(self.url, {'limit': 5})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()['results']), 5)
+
+        # Ранжирование вытеснено из кэша, но данные не менялись - версия та же
+        cache.clear()
+        with mock.patch('core.views.get_stored_ranking') as get_stored_ranking:
+            response = self.client.get(self.url, {'limit': 5}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        get_stored_ranking.assert_not_called()
+        self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+
+        self.profile.save()
+        response = self.client.get(self.url, {'limit': 5}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_cursor_reads_stored_ranking(self):
+        first = self.client.get(self.url, {'limit': 5}).json()
+        second = self.client.get(first['next'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual([v['rank'] for v in second.json()['results']], [6, 7, 8, 9, 10])
+        self.assertEqual(self.client.get(first['next'], HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
+
+    def test_cursor_survives_cache_miss(self):
+        first = self.client.get(self.url, {'limit': 5, 'city': 'Алматы'}).json()
+        expected = self.client.get(first['next']).json()
+        # Следующую страницу обслуживает воркер без ранжирования в кэше
+        cache.clear()
+        self.client.force_login(self.profile.user)
+        self.assertTrue(expected['results'])
+        self.assertEqual(self.client.get(first['next']).json(), expected)
+
+        # Данные изменились, а старого ранжирования в кэше нет - пересчет дал бы другую выдачу
+        self.profile.save()
+        cache.clear()
+        self.client.force_login(self.profile.user)
+        self.assertEqual(self.client.get(first['next']).status_code, 410)
+
+    def test_invalid_cursor_rejected(self):
+        key = ranking_version(self.profile, {})[0]
+        for cursor in (views._encode_cursor(key, -5, {}), views._encode_cursor(key, '5', {}), 'not-a-cursor'):
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 400)
+
+    @override_settings(VACANCY_INDEX_ENABLED=False)
+    def test_hh_ranking_revalidates_only_while_cached(self):
+        self.client.logout()
+        vacancies = [{'id': str(i), 'title': f"Вакансия {i}"} for i in range(3)]
+        with mock.patch('core.services.get_recommended_vacancies', return_value=vacancies) as fetch:
+            first = self.client.get(self.url)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+            cache.clear()
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+        self.assertEqual(fetch.call_count, 2)
+
+
+class SkillDemandTests(TestCase):
+
+    def _counts(self):
+        return {(r.shard, r.city, r.week, r.skill): r.count for r in SkillDemand.objects.all()}
+
+    def assertMatchesRebuild(self):
+        incremental = self._counts()
+        rebuild_skill_demand()
+        self.assertEqual(incremental, self._counts())
+
+    def test_incremental_counts_match_rebuild(self):
+        vacancies = synthetic_vacancies(60, seed=7)
+        store_vacancies(vacancies)
+        self.assertTrue(SkillDemand.objects.exists())
+        self.assertMatchesRebuild()
+
+        for vacancy in vacancies[:20]:
+            vacancy['skills'] = vacancy['skills'][:1] + ['Kubernetes']
+        for vacancy in vacancies[20:30]:
+            vacancy['published_at'] -= timedelta(days=14)
+        store_vacancies(vacancies[:30])
+        store_vacancies([dict(vacancy, skills=[]) for vacancy in vacancies[30:]], with_details=False)
+        self.assertMatchesRebuild()
+
+        # Архивация ограничена областью прохода - обходим все области синтетических вакансий
+        for area in {vacancy['area_id'] for vacancy in vacancies}:
+            refresher = VacancyRefresher(days=60, area=area)
+            refresher.run_started_at = timezone.now()
+            refresher.archive_unseen()
+        self.assertFalse(SkillDemand.objects.exists())
+        store_vacancies(vacancies[:10])
+        self.assertMatchesRebuild()
+
+    def test_failed_delta_rolls_back_upsert(self):
+        with mock.patch('core.services.apply_delta', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                store_vacancies(synthetic_vacancies(3))
+        self.assertFalse(Vacancy.objects.exists())
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class SkillGapsAdminTests(TestCase):
+
+    def setUp(self):
+        store_vacancies(synthetic_vacancies(60, seed=3))
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin_user)
+        self.url = reverse('admin:core_skilldemand_gaps')
+
+    def _add_groups(self, count):
+        for i in range(count):
+            profile = create_synthetic_student(100 + i, records=20, seed=count)
+            EducationInfo.objects.filter(student=profile).update(group_name=f"Группа-{count}-{i}")
+
+    def test_query_count_does_not_depend_on_groups(self):
+        # Пользователь (сессия в кэше), группы, предметы групп, спрос по шардам
+        self._add_groups(2)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['rows']), 2)
+
+        self._add_groups(6)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['rows']), 8)
+
+        # Совпадает с расчетом по отдельной группе
+        for row in response.context['rows']:
+            shard = None if row['shard'] == 'все' else row['shard']
+            subjects = AcademicRecord.objects.filter(student__education__group_name=row['group_name']).values_list('subject_name', flat=True)
+            self.assertEqual((row['gaps'], row['present']), skill_gaps(sorted(set(subjects)), shard=shard))
+
+    def test_weeks_parameter_validated(self):
+        for value, weeks in [('abc', 4), ('0', 1), ('-3', 1), ('1000', 52), ('8', 8)]:
+            response = self.client.get(self.url, {'weeks': value})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['weeks'], weeks)
+
+
+class EvaluationTests(TestCase):
+
+    def test_student_without_graded_records(self):
+        vacancies = synthetic_vacancies(40)
+        students = [create_synthetic_student(0, records=15), create_synthetic_student(1, records=0, practices=0)]
+        AcademicRecord.objects.filter(student=students[1]).delete()
+        students[1].education.delete()
+        students = list(StudentProfile.objects.with_related())
+
+        results = evaluate(students, vacancies, ['exact', 'skill_blend'], k=5)
+        # Эталон совпадает сам с собой; у студента без текста выдача запасная, без скоров
+        self.assertAlmostEqual(results[REFERENCE]['overlap'], 1.0)
+        self.assertEqual(set(results), {'exact', 'skill_blend'})
+
+
+class FacetTests(TestCase):
+
+    def test_salary_range_compared_within_one_currency(self):
+        vacancies = [
+            {'id': 'kzt', 'currency': 'KZT', 'salary_from': 400000, 'salary_to': None},
+            {'id': 'usd', 'currency': 'USD', 'salary_from': 3000, 'salary_to': 5000},
+            {'id': 'usd-big', 'currency': 'USD', 'salary_from': 500000, 'salary_to': None},
+            {'id': 'none', 'currency': None, 'salary_from': None, 'salary_to': None},
+        ]
+        index = FacetIndex(vacancies)
+
+        def ids(query):
+            return [v['id'] for v in index.select(vacancies, parse_filters(query))]
+
+        # Без выбранной валюты границы трактуются в тенге
+        self.assertEqual(ids({'salary_min': '300000'}), ['kzt'])
+        self.assertEqual(ids({'salary_min': '2000', 'currency': 'USD'}), ['usd', 'usd-big'])
+        self.assertEqual(ids({'salary_max': '4000', 'currency': 'usd'}), ['usd'])
+        self.assertEqual(ids({'salary_min': '1', 'currency': 'EUR'}), [])
+        # При нескольких валютах границы зарплаты не применяются
+        self.assertEqual(parse_filters({'salary_min': '2000', 'currency': ['USD', 'KZT']}), {'currency': ['usd', 'kzt']})
+        self.assertEqual(ids({'salary_min': '2000', 'currency': ['USD', 'KZT']}), ['kzt', 'usd', 'usd-big'])
+        self.assertEqual(len(ids({})), 4)
+
+
+class MetricsTests(TestCase):
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('recommendations/', views.recommendations_fragment, name='recommendations_fragment'),
+    path('api/recommendations/', views.recommendations_api, name='recommendations_api'),
     path('about/', views.about, name='about'),
     path('presentation/', views.presentation, name='presentation'),
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .facets import FacetIndex
+from .metrics import stage
+from .ml_recommender import VacancyRecommender
+from .models import Vacancy
+from .shards import GLOBAL_SHARD, shards_for_specialization
+from .skills import SkillGazetteer
+
+logger = logging.getLogger('core')
+
+
+class VacancyShard:
+    """
+    Шард индекса: вакансии одного семейства специальностей и их фасеты
+    """
+
+    def __init__(self, name, vacancies):
+        self.name = name
+        self.vacancies = vacancies
+        self.facets = FacetIndex(vacancies)
+
+    def __len__(self):
+        return len(self.vacancies)
+
+    def candidates(self, filters=None):
+        return self.facets.select(self.vacancies, filters)
+
+
+class VacancyIndex:
+    """
+    Индекс локально сохраненных вакансий, разбитый на шарды по специальностям.
+    Запрос студента сканирует только шарды его специальности (и глобальный шард,
+    если кандидатов не хватает), а не весь пул вакансий.
+    """
+
+    def __init__(self, vacancies, version=None, updated_at=None):
+        self.version = version
+        # Время последнего изменения вакансий индекса (Last-Modified для API)
+        self.updated_at = updated_at
+        by_shard = {}
+        for vacancy in vacancies:
+            by_shard.setdefault(vacancy.get('shard') or GLOBAL_SHARD, []).append(vacancy)
+        self.shards = {name: VacancyShard(name, items) for name, items in by_shard.items()}
+        self.size = len(vacancies)
+        # Словарь навыков по всем сохраненным key_skills
+        self.gazetteer = SkillGazetteer.from_vacancies(vacancies)
+
+    @classmethod
+    def load(cls):
+        """
+        Загружает актуальные вакансии из БД
+        """
+        stats = _version_stats()
+        vacancies = [vacancy.as_dict() for vacancy in _active_vacancies()]
+        index = cls(vacancies, version=_format_version(stats), updated_at=stats['updated'])
+        logger.info(f"VacancyIndex: загружено {index.size} вакансий, шарды: {index.shard_sizes()}, навыков в словаре: {len(index.gazetteer)}")
+        return index
+
+    def shard_sizes(self):
+        return {name: len(shard) for name, shard in sorted(self.shards.items())}
+
+    def shards_for(self, student_profile):
+        """
+        Имена шардов для студента; None - сканировать весь индекс
+        """
+        if not student_profile:
+            return None
+        try:
+            specialization = student_profile.education.specialization
+        except Exception:
+            return None
+        names = [name for name in shards_for_specialization(specialization) if name in self.shards]
+        return names or None
+
+    def candidates(self, shard_names=None, filters=None):
+        """
+        Кандидаты из указанных шардов после фасетных фильтров.
+        Возвращает (кандидаты, статистика по шардам).
+        """
+        names = shard_names if shard_names is not None else sorted(self.shards)
+        candidates = []
+        stats = []
+        for name in names:
+            shard = self.shards.get(name)
+            if shard is None:
+                continue
+            started = time.perf_counter()
+            selected = shard.candidates(filters)
+            candidates.extend(selected)
+            stats.append({
+                'shard': name,
+                'size': len(shard),
+                'selected': len(selected),
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+        return candidates, stats
+
+    def search(self, student_profile=None, filters=None, top_n=10):
+        """
+        Топ-N вакансий для студента (или свежие вакансии для гостя)
+        """
+        with stage('shard_select'):
+            shard_names = self.shards_for(student_profile)
+            candidates, stats = self.candidates(shard_names, filters)
+
+            min_candidates = getattr(settings, 'VACANCY_SHARD_MIN_CANDIDATES', 50)
+            if shard_names is not None and len(candidates) < min_candidates and GLOBAL_SHARD not in shard_names:
+                extra, extra_stats = self.candidates([GLOBAL_SHARD], filters)
+                candidates.extend(extra)
+                stats.extend(extra_stats)
+
+        for item in stats:
+            logger.debug(
+                "  🗂️  Шард '%s': размер %s, кандидатов %s, %.2f мс",
+                item['shard'], item['size'], item['selected'], item['ms'],
+            )
+
+        if not student_profile:
+            candidates.sort(key=lambda v: v['published_at'], reverse=True)
+            return [dict(v) for v in candidates[:top_n]]
+
+        started = time.perf_counter()
+        recommendations = VacancyRecommender(gazetteer=self.gazetteer).get_recommendations(
+            student_profile=student_profile,
+            # Копии, чтобы similarity_score не попадал в общий индекс
+            vacancies=[dict(v) for v in candidates],
+            top_n=top_n,
+        )
+        logger.debug(
+            "  ⏱️  Скоринг %s кандидатов из %s: %.2f мс",
+            len(candidates), self.size, (time.perf_counter() - started) * 1000,
+        )
+        return recommendations
+
+
+def _active_vacancies():
+    max_age = getattr(settings, 'VACANCY_MAX_AGE_DAYS', 30)
+    date_from = timezone.now() - timedelta(days=max_age)
+    return Vacancy.objects.filter(published_at__gte=date_from, is_archived=False)
+
+
+def _version_stats():
+    return _active_vacancies().aggregate(count=Count('id'), updated=Max('updated_at'))
+
+
+def _format_version(stats):
+    updated = stats['updated'].isoformat() if stats['updated'] else ''
+    return f"{stats['count']}:{updated}"
+
+
+def current_version():
+    """
+    Версия содержимого индекса: меняется при любом изменении набора вакансий
+    """
+    return _format_version(_version_stats())
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_vacancy_index():
+    """
+    Индекс процесса. Версия в БД сверяется не чаще раза в VACANCY_INDEX_TTL секунд,
+    при изменении индекс перестраивается.
+    """
+    global _index, _checked_at
+
+    ttl = getattr(settings, 'VACANCY_INDEX_TTL', 60)
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < ttl:
+        return _index
+
+    with _lock:
+        if _index is not None and time.monotonic() - _checked_at < ttl:
+            return _index
+        version = current_version()
+        if _index is None or _index.version != version:
+            _index = VacancyIndex.load()
+        _checked_at = time.monotonic()
+        return _index
@@ -1,24 +1,156 @@
+import base64
+import binascii
+import hmac
+import json
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
-from .services import get_hh_vacancies
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from users.models import StudentProfile
+from .services import get_recommended_vacancies, get_ranking_by_key, get_stored_ranking, ranking_version
+from .metrics import render as render_metrics, stage
+from .facets import parse_filters, EMPLOYMENT_CHOICES, EXPERIENCE_CHOICES, CURRENCY_CHOICES
 
-def index(request):
+def _recommendations(request, filters):
     student_profile = None
     if request.user.is_authenticated:
-        try:
-            student_profile = request.user.student_profile
-        except:
-            student_profile = None
-    
-    hh_vacancies = get_hh_vacancies(student_profile=student_profile)
+        student_profile = StudentProfile.objects.with_related().filter(user=request.user).first()
+    return get_recommended_vacancies(student_profile=student_profile, filters=filters)
+
+def index(request):
+    filters = parse_filters(request.GET)
+    # Отложенная загрузка: оболочка страницы уходит сразу, карточки подгружаются из recommendations_fragment
+    deferred = settings.DASHBOARD_DEFERRED and request.GET.get('deferred') != '0'
     
     context = {
-        'recommendations': hh_vacancies,
+        'filters': filters,
+        'employment_choices': EMPLOYMENT_CHOICES,
+        'experience_choices': EXPERIENCE_CHOICES,
+        'currency_choices': CURRENCY_CHOICES,
+        'deferred': deferred,
+        'skeleton': range(4),
     }
+    if not deferred:
+        context['recommendations'] = _recommendations(request, filters)
     
-    return render(request, 'index.html', context)
+    with stage('render'):
+        return render(request, 'index.html', context)
+
+def recommendations_fragment(request):
+    """
+    HTML-фрагмент с карточками рекомендаций для отложенной загрузки дашборда
+    """
+    context = {'recommendations': _recommendations(request, parse_filters(request.GET))}
+    
+    with stage('render'):
+        return render(request, '_recommendations.html', context)
+
+def _encode_cursor(key, offset, filters):
+    # Курсор самодостаточен: по фильтрам ранжирование пересчитывается, если его нет в кэше воркера
+    payload = json.dumps({'key': key, 'offset': offset, 'filters': filters}, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+        key, offset, filters = data['key'], data['offset'], data['filters']
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(key, str) or type(offset) is not int or offset < 0 or not isinstance(filters, dict):
+        return None
+    return key, offset, parse_filters(filters)
+
+def recommendations_api(request):
+    """
+    Рекомендации в JSON с курсорной пагинацией по сохраненному ранжированию.
+
+    Первая страница строит (или берет из кэша) ранжирование для студента и фильтров,
+    курсор `next` указывает на следующую страницу того же ранжирования. Если ранжирования
+    нет в кэше (вытеснено или кэш не общий - LocMem без REDIS_URL), а версия данных
+    не изменилась, оно пересчитывается по фильтрам из курсора; иначе курсор устарел (410).
+    ETag (ключ ранжирования и страница) и Last-Modified зависят от версии данных
+    студента и индекса вакансий и проверяются до вычисления ранжирования:
+    если ничего не изменилось, ответ - 304 без тела.
+    """
+    student_profile = None
+    if request.user.is_authenticated:
+        student_profile = StudentProfile.objects.with_related().filter(user=request.user).first()
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), settings.RECOMMENDATIONS_PAGE_MAX)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный limit'}, status=400)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        decoded = _decode_cursor(cursor)
+        if decoded is None:
+            return JsonResponse({'error': 'Некорректный курсор'}, status=400)
+        key, offset, filters = decoded
+        ranking = get_ranking_by_key(key)
+        if ranking is None:
+            version = ranking_version(student_profile=student_profile, filters=filters)
+            # Пересчет дает то же ранжирование, только если у данных есть версия (локальный индекс)
+            if version[0] == key and version[2]:
+                ranking = get_stored_ranking(student_profile=student_profile, filters=filters, version=version)
+        if ranking is None or ranking['student_id'] != (student_profile.pk if student_profile else None):
+            return JsonResponse({'error': 'Курсор устарел, запросите первую страницу заново'}, status=410)
+        last_modified, versioned = ranking.get('last_modified'), True
+    else:
+        offset = 0
+        filters = parse_filters(request.GET)
+        version = ranking_version(student_profile=student_profile, filters=filters)
+        key, last_modified, versioned = version
+        ranking = None
+
+    etag = f'"{key}-{offset}-{limit}"'
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = None
+    # Без локального индекса у вакансий HH нет версии: 304 только пока ранжирование в кэше
+    if versioned or get_ranking_by_key(key) is not None:
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None and ranking is None:
+        ranking = get_stored_ranking(student_profile=student_profile, filters=filters, version=version)
+
+    if response is None:
+        vacancies = ranking['vacancies']
+        page = vacancies[offset:offset + limit]
+        next_offset = offset + limit
+        next_url = None
+        if next_offset < len(vacancies):
+            next_url = request.build_absolute_uri(
+                f"{request.path}?cursor={_encode_cursor(ranking['key'], next_offset, filters)}&limit={limit}"
+            )
+        response = JsonResponse(
+            {
+                'count': len(vacancies),
+                'next': next_url,
+                'results': [dict(vacancy, rank=offset + i) for i, vacancy in enumerate(page, 1)],
+            },
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Ответ зависит от пользователя; клиент кэширует, но каждый раз сверяет ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response
 
 def about(request):
     return render(request, 'about.html')
 
 def presentation(request):
-    return render(request, 'presentation.html')
\ No newline at end of file
+    return render(request, 'presentation.html')
+
+def metrics(request):
+    # Метрики доступны только с токеном METRICS_TOKEN (Authorization: Bearer ...)
+    token = settings.METRICS_TOKEN
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not token or not hmac.compare_digest(provided.encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,51 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core')
+
+
+def warm_up():
+    """
+    Прогрев воркера при старте: импорт scikit-learn, пробная векторизация
+    и загрузка локального индекса вакансий со словарем навыков.
+
+    Вызывается из wsgi.py/asgi.py (WARMUP_ON_START). При запуске gunicorn с --preload
+    модуль приложения импортируется в мастер-процессе, и прогретое состояние
+    наследуется воркерами после fork (copy-on-write).
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    step = time.perf_counter()
+    from .ml_recommender import VacancyRecommender
+
+    # Первая векторизация компилирует регулярные выражения токенизатора и прогревает scipy.sparse
+    recommender = VacancyRecommender()
+    recommender._similarities('python разработчик', ['python django разработчик', 'бухгалтер'])
+    timings['sklearn_ms'] = (time.perf_counter() - step) * 1000
+
+    if getattr(settings, 'VACANCY_INDEX_ENABLED', False):
+        from .vacancy_index import get_vacancy_index
+
+        step = time.perf_counter()
+        try:
+            index = get_vacancy_index()
+            timings['index_ms'] = (time.perf_counter() - step) * 1000
+            timings['index_size'] = index.size
+            timings['skills'] = len(index.gazetteer)
+        except Exception as e:
+            # База может быть еще не готова (миграции, первый деплой) - воркер стартует без прогрева
+            logger.warning(f"⚠️  Прогрев индекса вакансий не удался: {e}")
+
+    # Соединение с БД не должно переживать fork в воркеры
+    connections.close_all()
+
+    logger.info(
+        "warmup duration_ms=%.1f %s",
+        (time.perf_counter() - started) * 1000,
+        ' '.join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}" for key, value in timings.items()),
+    )
+    return timings
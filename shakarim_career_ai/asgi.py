@@ -5,3 +5,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shakarim_career_ai.settings')
 
 application = get_asgi_application()
+
+# Прогрев ML-стека и индекса вакансий до первого запроса (с gunicorn --preload - до fork)
+from django.conf import settings
+
+if settings.WARMUP_ON_START:
+    from core.warmup import warm_up
+
+    warm_up()
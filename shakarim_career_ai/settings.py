@@ -1,5 +1,7 @@
 import os
 from pathlib import Path
+
+from whitenoise.compress import Compressor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,7 +10,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv('SECRET_KEY')
 
-DEBUG = os.getenv('DEBUG')
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",")
 
@@ -19,6 +21,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Статика через WhiteNoise и в runserver, чтобы поведение совпадало с продакшеном
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'core',
     'users',
@@ -26,10 +30,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.log_handlers.RequestLogMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,13 +61,54 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'shakarim_career_ai.wsgi.application'
 
-DATABASES = {
+# PostgreSQL, если задан DB_NAME; иначе SQLite для разработки
+if os.getenv('DB_NAME'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Соединение переиспользуется между запросами и проверяется перед использованием
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # WAL: чтение не блокируется записью; писатели ждут блокировку, а не падают сразу
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Кэш: Redis, если задан REDIS_URL (общий для всех воркеров), иначе память процесса.
+# С несколькими воркерами нужен общий кэш: иначе сессии и сохраненные ранжирования
+# API рекомендаций (курсоры) видит только воркер, который их создал
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'careerai',
     }
 }
 
+# Сессии читаются из кэша, запись идет в кэш и в БД (переживают сброс кэша)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Сессия сохраняется только при изменении, а не на каждый запрос
+SESSION_SAVE_EVERY_REQUEST = False
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -85,6 +133,21 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic дает файлам имена с хэшем содержимого и готовит рядом .gz и .br;
+# WhiteNoise отдает их с Cache-Control на год (immutable) и поддерживает Range
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# PDF не сжимаем: просмотрщик грузит страницы Range-запросами, а WhiteNoise выбирает
+# сжатый вариант по Accept-Encoding раньше, чем применяет Range
+WHITENOISE_SKIP_COMPRESS_EXTENSIONS = [*Compressor.SKIP_COMPRESS_EXTENSIONS, 'pdf']
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTHENTICATION_BACKENDS = [
@@ -92,6 +155,16 @@ AUTHENTICATION_BACKENDS = [
     'users.backends.APILoginBackend',
 ]
 
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Доля запросов, для которых пишется подробный DEBUG-лог (0 - выключено).
+# С выборкой логгеры приложения пропускают DEBUG, а фильтр sampled_debug отбрасывает
+# записи ниже LOG_LEVEL вне выбранных запросов; без нее уровень логгеров - LOG_LEVEL
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0))
+APP_LOGGER_LEVEL = 'DEBUG' if LOG_DEBUG_SAMPLE_RATE > 0 else LOG_LEVEL
+
+# Каталог логов, чекпоинтов и профилей не хранится в репозитории
+(BASE_DIR / 'logs').mkdir(exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -103,6 +176,11 @@ LOGGING = {
             'format': '%(levelname)s %(message)s',
         },
     },
+    'filters': {
+        'sampled_debug': {
+            '()': 'core.log_handlers.SampledDebugFilter',
+        },
+    },
     'handlers': {
         'file_errors': {
             'level': 'ERROR',
@@ -112,7 +190,7 @@ LOGGING = {
             'encoding': 'utf-8',
         },
         'file_all': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': str(BASE_DIR / 'logs' / 'app.log'),
             'formatter': 'verbose',
@@ -123,16 +201,23 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        # Запись в файлы и консоль выполняется в фоновом потоке, а не в потоке запроса
+        'queue': {
+            '()': 'core.log_handlers.queue_listener_handler',
+            'handlers': ['cfg://handlers.file_all', 'cfg://handlers.file_errors', 'cfg://handlers.console'],
+        },
     },
     'loggers': {
         'users': {
-            'handlers': ['file_all', 'file_errors', 'console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'filters': ['sampled_debug'],
+            'level': APP_LOGGER_LEVEL,
             'propagate': False,
         },
         'core': {
-            'handlers': ['file_all', 'file_errors', 'console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'filters': ['sampled_debug'],
+            'level': APP_LOGGER_LEVEL,
             'propagate': False,
         },
     },
@@ -145,4 +230,56 @@ LOGOUT_REDIRECT_URL = 'login'
 STUDENT_DATA_API_URL = os.getenv('STUDENT_DATA_API_URL')
 STUDENT_DATA_API_TOKEN = os.getenv('STUDENT_DATA_API_TOKEN')
 EXTERNAL_API_URL = os.getenv('EXTERNAL_API_URL')
-HH_API_URL = os.getenv('HH_API_URL')
\ No newline at end of file
+HH_API_URL = os.getenv('HH_API_URL')
+
+# Локальный индекс вакансий
+VACANCY_INDEX_ENABLED = os.getenv('VACANCY_INDEX_ENABLED', 'False') == 'True'
+VACANCY_INDEX_TTL = int(os.getenv('VACANCY_INDEX_TTL', 60))
+VACANCY_MAX_AGE_DAYS = 30
+VACANCY_SHARD_MIN_CANDIDATES = 50
+# Сохранять вакансии, полученные из HH при запросе дашборда, в локальное хранилище.
+# По умолчанию выключено: хранилище наполняют hh_harvest/refresh_vacancies вне запросов
+HH_STORE_ON_REQUEST = os.getenv('HH_STORE_ON_REQUEST', 'False') == 'True'
+HH_HARVEST_CHECKPOINT = BASE_DIR / 'logs' / 'hh_harvest_checkpoint.json'
+HH_REFRESH_CHECKPOINT = BASE_DIR / 'logs' / 'hh_refresh_checkpoint.json'
+
+# Массовое обновление данных студентов (manage.py refresh_students)
+STUDENT_REFRESH_CHECKPOINT = BASE_DIR / 'logs' / 'students_refresh_checkpoint.json'
+STUDENT_REFRESH_RATE = float(os.getenv('STUDENT_REFRESH_RATE', 10))
+
+# Выгрузка студентов с рекомендациями (admin, manage.py export_students)
+STUDENT_EXPORT_TOP_N = 5
+STUDENT_EXPORT_CHUNK_SIZE = 500
+
+# Прогрев воркера при старте (core.warmup): scikit-learn и индекс вакансий
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'True') == 'True'
+
+# Дашборд отдает оболочку сразу, а карточки рекомендаций подгружаются отдельным запросом
+DASHBOARD_DEFERRED = os.getenv('DASHBOARD_DEFERRED', 'True') == 'True'
+
+# JSON API рекомендаций: глубина сохраненного ранжирования, время его жизни и размер страницы
+RECOMMENDATIONS_API_MAX = 200
+RECOMMENDATIONS_CACHE_TTL = int(os.getenv('RECOMMENDATIONS_CACHE_TTL', 600))
+RECOMMENDATIONS_PAGE_MAX = 50
+
+# Доля совпадения навыков (словарь key_skills) в итоговом скоре рекомендации.
+# По умолчанию 0 - выдача чисто по TF-IDF; смешивание включается явно после
+# сравнения на manage.py evaluate_recommender (конфигурация skill_blend)
+SKILL_MATCH_WEIGHT = float(os.getenv('SKILL_MATCH_WEIGHT', 0))
+
+# Токен для /metrics (Prometheus: authorization / bearer_token); без него эндпоинт закрыт.
+# Проверка по адресу не годится: за локальным reverse proxy все запросы идут с 127.0.0.1
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Профилирование запросов по требованию (X-Profile: 1 / ?_profile=1 для персонала)
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'cprofile')  # cprofile | sampling
+PROFILING_VIEWS = ('index', 'recommendations_fragment', 'login')
+PROFILING_DIR = BASE_DIR / 'logs' / 'profiles'
+PROFILING_KEEP = 100
+
+# Базовая линия микробенчмарка рекомендаций (manage.py bench_recommender)
+BENCHMARK_BASELINE = BASE_DIR / 'benchmarks' / 'recommender_baseline.json'
+
+# Замороженный снимок вакансий для оценки качества рекомендаций (manage.py evaluate_recommender)
+EVALUATION_SNAPSHOT = BASE_DIR / 'benchmarks' / 'vacancy_snapshot.json'
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .export import export_response
 from .models import StudentProfile, EducationInfo, AcademicRecord, PracticeExperience
 
 
@@ -30,6 +31,7 @@ class StudentProfileAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
     
     inlines = [EducationInfoInline, AcademicRecordInline, PracticeExperienceInline]
+    actions = ['export_csv', 'export_jsonl']
     
     fieldsets = (
         ('Основная информация', {
@@ -47,6 +49,14 @@ class StudentProfileAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Выгрузить в CSV (с рекомендациями)')
+    def export_csv(self, request, queryset):
+        return export_response('csv', queryset)
+
+    @admin.action(description='Выгрузить в JSONL (с рекомендациями)')
+    def export_jsonl(self, request, queryset):
+        return export_response('jsonl', queryset)
+
 
 @admin.register(EducationInfo)
 class EducationInfoAdmin(admin.ModelAdmin):
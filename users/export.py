@@ -0,0 +1,145 @@
+import csv
+import json
+import logging
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import StudentProfile
+
+logger = logging.getLogger('users')
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+PROFILE_COLUMNS = [
+    'person_id', 'full_name', 'course_number', 'gpa', 'city',
+    'profession', 'specialization', 'degree', 'group_name', 'education_program_form',
+    'graded_subjects', 'practices',
+]
+RECOMMENDATION_COLUMNS = ['hh_id', 'title', 'company', 'score', 'url']
+# Начало ячейки, с которого Excel/LibreOffice разбирают ее как формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Echo:
+    """
+    Псевдофайл для csv.writer: write() возвращает строку, а не пишет ее
+    """
+
+    def write(self, value):
+        return value
+
+
+def _recommender():
+    """
+    Поиск рекомендаций только по локальному индексу вакансий: при выгрузке тысяч
+    студентов запросы к HH API на каждого недопустимы
+    """
+    if not getattr(settings, 'VACANCY_INDEX_ENABLED', False):
+        return None
+    from core.vacancy_index import get_vacancy_index
+
+    index = get_vacancy_index()
+    if not index.size:
+        logger.warning("⚠️  Локальный индекс вакансий пуст, выгрузка без рекомендаций")
+        return None
+    return index
+
+
+def student_records(queryset=None, top_n=None, chunk_size=None):
+    """
+    Генератор записей студентов (профиль, образование, GPA, топ-N рекомендаций).
+    Студенты читаются iterator() пакетами по chunk_size вместе с prefetch_related,
+    поэтому в памяти одновременно находится не больше одного пакета.
+    """
+    top_n = settings.STUDENT_EXPORT_TOP_N if top_n is None else top_n
+    chunk_size = chunk_size or settings.STUDENT_EXPORT_CHUNK_SIZE
+    queryset = StudentProfile.objects.all() if queryset is None else queryset
+    index = _recommender() if top_n else None
+
+    for profile in queryset.with_related().order_by('id').iterator(chunk_size=chunk_size):
+        education = getattr(profile, 'education', None)
+        recommendations = []
+        if index is not None:
+            try:
+                recommendations = index.search(student_profile=profile, top_n=top_n)
+            except Exception as e:
+                logger.warning(f"⚠️  Студент {profile.person_id}: не удалось построить рекомендации - {e}")
+
+        yield {
+            'person_id': profile.person_id,
+            'full_name': profile.user.get_full_name(),
+            'course_number': profile.course_number,
+            'gpa': str(profile.gpa) if profile.gpa is not None else None,
+            'city': profile.city,
+            'profession': education.profession if education else '',
+            'specialization': education.specialization if education else '',
+            'degree': education.degree if education else '',
+            'group_name': education.group_name if education else '',
+            'education_program_form': (education.education_program_form or '') if education else '',
+            'graded_subjects': sum(1 for record in profile.academic_records.all() if record.grade),
+            'practices': len(profile.practices.all()),
+            'recommendations': [
+                {
+                    'hh_id': vacancy.get('id'),
+                    'title': vacancy.get('title'),
+                    'company': vacancy.get('company'),
+                    'score': round(vacancy.get('similarity_score', 0.0), 2),
+                    'url': vacancy.get('url'),
+                }
+                for vacancy in recommendations
+            ],
+        }
+
+
+def _csv_cell(value):
+    """
+    Экранирует строки, похожие на формулу (названия вакансий и компаний приходят из HH как есть)
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(records, top_n=None):
+    """
+    CSV по строке на студента; рекомендации - повторяющиеся группы колонок rec<i>_*
+    """
+    top_n = settings.STUDENT_EXPORT_TOP_N if top_n is None else top_n
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        PROFILE_COLUMNS
+        + [f"rec{i}_{column}" for i in range(1, top_n + 1) for column in RECOMMENDATION_COLUMNS]
+    )
+    for record in records:
+        row = [record[column] for column in PROFILE_COLUMNS]
+        for i in range(top_n):
+            vacancy = record['recommendations'][i] if i < len(record['recommendations']) else {}
+            row.extend(vacancy.get(column) for column in RECOMMENDATION_COLUMNS)
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def export_lines(fmt, queryset=None, top_n=None, chunk_size=None):
+    top_n = settings.STUDENT_EXPORT_TOP_N if top_n is None else top_n
+    records = student_records(queryset, top_n=top_n, chunk_size=chunk_size)
+    if fmt == 'csv':
+        return csv_lines(records, top_n)
+    return jsonl_lines(records)
+
+
+def export_response(fmt, queryset=None, top_n=None):
+    """
+    Потоковый ответ с выгрузкой: строки отдаются клиенту по мере построения
+    """
+    response = StreamingHttpResponse(export_lines(fmt, queryset, top_n), content_type=FORMATS[fmt])
+    filename = f"students_{timezone.localtime():%Y%m%d_%H%M}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
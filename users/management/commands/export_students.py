@@ -0,0 +1,37 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.export import FORMATS, export_lines
+from users.models import StudentProfile
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка студентов (профиль, образование, GPA, топ-N рекомендаций) в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv', help='Формат выгрузки')
+        parser.add_argument('--output', '-o', default='-', help='Файл (по умолчанию stdout)')
+        parser.add_argument('--top', type=int, default=settings.STUDENT_EXPORT_TOP_N, help='Рекомендаций на студента (0 - без них)')
+        parser.add_argument('--chunk-size', type=int, default=settings.STUDENT_EXPORT_CHUNK_SIZE, help='Студентов в одном пакете чтения')
+        parser.add_argument('--course', type=int, default=None, help='Только студенты этого курса')
+
+    def handle(self, *args, **options):
+        queryset = StudentProfile.objects.all()
+        if options['course']:
+            queryset = queryset.filter(course_number=options['course'])
+
+        lines = export_lines(options['format'], queryset, top_n=options['top'], chunk_size=options['chunk_size'])
+        if options['output'] == '-':
+            sys.stdout.writelines(lines)
+            return
+
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        if options['format'] == 'csv':
+            count -= 1
+        self.stderr.write(self.style.SUCCESS(f"Выгружено студентов: {count} -> {options['output']}"))
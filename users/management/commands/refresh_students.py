@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.sync import StudentRefresher
+
+
+class Command(BaseCommand):
+    help = 'Обновляет данные всех студентов из API университета (пропуская неизменившиеся)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Число параллельных запросов')
+        parser.add_argument('--rate', type=float, default=settings.STUDENT_REFRESH_RATE, help='Запросов в секунду (0 - без ограничения)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Студентов в одном пакете записи')
+        parser.add_argument('--checkpoint', default=str(settings.STUDENT_REFRESH_CHECKPOINT), help='Файл чекпоинта')
+        parser.add_argument('--reset', action='store_true', help='Начать заново, игнорируя чекпоинт')
+        parser.add_argument('--force', action='store_true', help='Перезаписать данные, даже если хэш не изменился')
+
+    def handle(self, *args, **options):
+        refresher = StudentRefresher(
+            workers=options['workers'],
+            rate=options['rate'],
+            batch_size=options['batch_size'],
+            checkpoint_path=options['checkpoint'],
+            force=options['force'],
+        )
+        if options['reset']:
+            refresher.reset_checkpoint()
+
+        stats = refresher.run()
+
+        self.stdout.write(
+            f"Студентов: {stats['students']} (обновлено {stats['updated']}, без изменений {stats['unchanged']}, "
+            f"отклонено API {stats['rejected']})"
+        )
+        message = f"Ошибок: {stats['failed']}; время {stats['seconds']:.1f} с, {stats['per_second']:.1f} студ/с"
+        self.stdout.write(self.style.ERROR(message) if stats['failed'] else message)
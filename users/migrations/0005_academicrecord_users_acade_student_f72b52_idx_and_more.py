@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_educationinfo_education_program_form'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='academicrecord',
+            index=models.Index(fields=['student', 'grade'], name='users_acade_student_f72b52_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceexperience',
+            index=models.Index(fields=['student', 'start_date'], name='users_pract_student_c90986_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_academicrecord_users_acade_student_f72b52_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='data_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
@@ -1,6 +1,15 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+class StudentProfileQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Профиль вместе с пользователем, образованием, оценками и практиками:
+        фиксированное число запросов независимо от количества записей
+        """
+        return self.select_related('user', 'education').prefetch_related('academic_records', 'practices')
+
+
 class StudentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='student_profile')
     
@@ -16,10 +25,14 @@ class StudentProfile(models.Model):
     course_number = models.IntegerField(null=True, blank=True)
     city = models.CharField(max_length=200, blank=True)
     living_address = models.CharField(max_length=500, blank=True)
+    # sha1 последнего сохраненного ответа API данных студента
+    data_hash = models.CharField(max_length=40, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StudentProfileQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.get_full_name()} ({self.person_id})"
 
@@ -54,6 +67,9 @@ class AcademicRecord(models.Model):
     
     class Meta:
         ordering = ['-score']
+        indexes = [
+            models.Index(fields=['student', 'grade']),
+        ]
     
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.subject_name} ({self.grade})"
@@ -72,6 +88,9 @@ class PracticeExperience(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['student', 'start_date']),
+        ]
     
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.practice_type}"
\ No newline at end of file
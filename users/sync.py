@@ -0,0 +1,291 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import StudentProfile, EducationInfo, AcademicRecord, PracticeExperience
+
+logger = logging.getLogger('users')
+
+PROFILE_FIELDS = ['gpa', 'course_number', 'city', 'living_address', 'data_hash', 'updated_at']
+EDUCATION_FIELDS = [
+    'profession', 'degree', 'qualification', 'specialization',
+    'group_name', 'adviser_full_name', 'education_program_form', 'updated_at',
+]
+
+
+def fetch_student_data(student_id, session=None):
+    """
+    Запрос к API данных студента; возвращает разобранный JSON-ответ
+    """
+    response = (session or requests).get(
+        settings.STUDENT_DATA_API_URL,
+        params={'studentid': student_id, 'token': settings.STUDENT_DATA_API_TOKEN},
+        timeout=10,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def payload_hash(data):
+    """
+    Хэш данных студента: по нему пропускаются неизменившиеся ответы
+    """
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+
+def parse_date(date_string):
+    """
+    Парсит дату из строки формата YYYY-MM-DD
+    """
+    if not date_string:
+        return None
+    try:
+        return datetime.strptime(date_string, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None
+
+
+def _apply_profile(profile, data, data_hash):
+    student_info = data.get('studentInfo', {})
+    profile.gpa = student_info.get('gpa')
+    profile.course_number = student_info.get('courseNumber')
+    profile.city = student_info.get('city', '')
+    profile.living_address = student_info.get('livingAddress', '')
+    profile.data_hash = data_hash
+    profile.updated_at = timezone.now()
+
+
+def _education(profile, data):
+    education_info = data.get('educationInfo', {})
+    return EducationInfo(
+        student=profile,
+        profession=education_info.get('profession', ''),
+        degree=education_info.get('degree', ''),
+        qualification=education_info.get('qualification', ''),
+        specialization=education_info.get('specialization', ''),
+        group_name=education_info.get('groupName', ''),
+        adviser_full_name=education_info.get('adviserFullName', ''),
+        education_program_form=education_info.get('educationProgramForm', ''),
+    )
+
+
+def _records(profile, data):
+    return [
+        AcademicRecord(
+            student=profile,
+            subject_name=record.get('subjectName', '').strip(),
+            credits=record.get('credits', 0),
+            grade=record.get('grade'),
+            score=record.get('score'),
+        )
+        for record in data.get('academicPerformance', [])
+        if record.get('subjectName')
+    ]
+
+
+def _practices(profile, data):
+    return [
+        PracticeExperience(
+            student=profile,
+            organization=practice.get('organization'),
+            position=practice.get('position', ''),
+            start_date=parse_date(practice.get('startDate')),
+            end_date=parse_date(practice.get('endDate')),
+            practice_type=practice.get('practiceType', ''),
+        )
+        for practice in data.get('practicalExperience', [])
+    ]
+
+
+def save_students_data(items):
+    """
+    Пакетная запись данных студентов: [(profile, data, data_hash), ...].
+    Профили, образование, оценки и практики пишутся несколькими bulk-запросами
+    в одной транзакции, независимо от размера пакета.
+    """
+    if not items:
+        return 0
+    profiles = []
+    educations = []
+    records = []
+    practices = []
+    for profile, data, data_hash in items:
+        _apply_profile(profile, data, data_hash)
+        profiles.append(profile)
+        educations.append(_education(profile, data))
+        records.extend(_records(profile, data))
+        practices.extend(_practices(profile, data))
+
+    with transaction.atomic():
+        StudentProfile.objects.bulk_update(profiles, PROFILE_FIELDS)
+        EducationInfo.objects.bulk_create(
+            educations,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=EDUCATION_FIELDS,
+        )
+        AcademicRecord.objects.filter(student__in=profiles).delete()
+        AcademicRecord.objects.bulk_create(records, batch_size=500)
+        PracticeExperience.objects.filter(student__in=profiles).delete()
+        PracticeExperience.objects.bulk_create(practices, batch_size=500)
+    return len(profiles)
+
+
+def sync_student(profile, session=None, force=False):
+    """
+    Загружает данные одного студента и сохраняет их, если они изменились.
+    Возвращает 'updated', 'unchanged' или 'rejected'; сетевые ошибки пробрасываются.
+    """
+    result = fetch_student_data(profile.person_id, session)
+    if result.get('status') != 'success':
+        return 'rejected'
+    data = result.get('data', {})
+    data_hash = payload_hash(data)
+    if not force and data_hash == profile.data_hash:
+        return 'unchanged'
+    save_students_data([(profile, data, data_hash)])
+    return 'updated'
+
+
+class RateLimiter:
+    """
+    Не больше `rate` вызовов acquire() в секунду на все потоки
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class StudentRefresher:
+    """
+    Массовое обновление данных всех студентов из STUDENT_DATA_API_URL.
+
+    Студенты обходятся пакетами по возрастанию id. Запросы пакета идут
+    параллельно (`workers`) с общим ограничением частоты (`rate` запросов в секунду).
+    Ответы, хэш которых совпадает с сохраненным `data_hash`, пропускаются.
+    Изменившиеся пишутся в БД одним пакетом. После каждого пакета в чекпоинт
+    пишется последний обработанный id, и прерванный запуск продолжается с него.
+    """
+
+    def __init__(self, workers=4, rate=10.0, batch_size=100, checkpoint_path=None, force=False):
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.force = force
+        self._local = threading.local()
+        self.stats = {'students': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0, 'failed': 0, 'batches': 0}
+
+    # Чекпоинт
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path:
+            return {'last_id': 0}
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'last_id': 0}
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Не удалось прочитать чекпоинт {self.checkpoint_path}: {e}")
+            return {'last_id': 0}
+
+    def _save_checkpoint(self, checkpoint):
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        # Атомарная замена, чтобы прерывание не оставило битый файл
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset_checkpoint(self):
+        self._save_checkpoint({'last_id': 0})
+
+    # Загрузка
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _fetch(self, profile):
+        self.rate_limiter.acquire()
+        try:
+            return profile, fetch_student_data(profile.person_id, self._session()), None
+        except (requests.RequestException, ValueError) as e:
+            return profile, None, e
+
+    def refresh_batch(self, executor, profiles):
+        changed = []
+        for profile, result, error in executor.map(self._fetch, profiles):
+            self.stats['students'] += 1
+            if error is not None:
+                self.stats['failed'] += 1
+                logger.warning(f"  ⚠️  Студент {profile.person_id}: ошибка загрузки данных - {error}")
+                continue
+            if result.get('status') != 'success':
+                self.stats['rejected'] += 1
+                continue
+            data = result.get('data', {})
+            data_hash = payload_hash(data)
+            if not self.force and data_hash == profile.data_hash:
+                self.stats['unchanged'] += 1
+                continue
+            changed.append((profile, data, data_hash))
+
+        self.stats['updated'] += save_students_data(changed)
+        self.stats['batches'] += 1
+
+    def run(self):
+        checkpoint = self._load_checkpoint()
+        last_id = checkpoint.get('last_id', 0)
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                profiles = list(
+                    StudentProfile.objects.filter(id__gt=last_id).order_by('id')[:self.batch_size]
+                )
+                if not profiles:
+                    break
+
+                self.refresh_batch(executor, profiles)
+                last_id = profiles[-1].id
+                self._save_checkpoint({'last_id': last_id})
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"  ✓ Пакет до id {last_id}: всего {self.stats['students']} студентов, "
+                    f"{self.stats['students'] / elapsed if elapsed else 0:.1f} студ/с"
+                )
+
+        # Проход завершен: следующий запуск начнет заново и повторит неудавшихся студентов
+        self.reset_checkpoint()
+
+        self.stats['seconds'] = time.perf_counter() - started
+        self.stats['per_second'] = self.stats['students'] / self.stats['seconds'] if self.stats['seconds'] else 0
+        return self.stats
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.benchmarks import create_synthetic_student
+from .export import PROFILE_COLUMNS, csv_lines
+
+TEST_STORAGES = dict(settings.STORAGES, staticfiles={'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'})
+
+
+@override_settings(STORAGES=TEST_STORAGES)
+class ProfileViewQueryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.profile = create_synthetic_student(0, records=30, practices=2)
+        self.client.force_login(self.profile.user)
+        user = self.profile.user
+        self.fragment_key = make_template_fragment_key(
+            'student_profile',
+            [self.profile.pk, self.profile.updated_at.isoformat(), user.first_name, user.last_name, user.email],
+        )
+
+    def test_cold_cache(self):
+        # Пользователь и профиль
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('profile'))
+        self.assertContains(response, self.profile.person_id)
+        self.assertIsNotNone(cache.get(self.fragment_key))
+
+    def test_warm_cache(self):
+        self.client.get(reverse('profile'))
+        cache.set(self.fragment_key, 'cached-profile-card')
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('profile'))
+        # Карточка берется из кэша, а не рендерится заново
+        self.assertContains(response, 'cached-profile-card')
+        self.assertNotContains(response, self.profile.person_id)
+
+    def test_user_change_invalidates_card(self):
+        self.client.get(reverse('profile'))
+        user = self.profile.user
+        user.email = 'new-address@example.com'
+        user.save()
+        response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'new-address@example.com')
+
+
+class ExportCsvTests(TestCase):
+
+    def test_formula_cells_escaped(self):
+        record = dict.fromkeys(PROFILE_COLUMNS, '')
+        record.update(full_name='@SUM(A1)', graded_subjects=3, practices=0)
+        record['recommendations'] = [
+            {'hh_id': '1', 'title': '=HYPERLINK("http://x")', 'company': '+7 Group', 'score': -0.5, 'url': 'https://hh.kz/vacancy/1'},
+        ]
+        header, row = list(csv_lines([record], top_n=1))
+        self.assertIn('rec1_title', header)
+        self.assertIn('''"'=HYPERLINK(""http://x"")"''', row)
+        self.assertIn("'+7 Group", row)
+        self.assertIn("'@SUM(A1)", row)
+        # Числа не экранируются
+        self.assertIn(',-0.5,', row)
@@ -2,6 +2,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 
+from .models import StudentProfile
+
 def login_view(request):
     error_message = None
     if 'login_error' in request.session:
@@ -26,11 +28,8 @@ def login_view(request):
 
 @login_required
 def profile_view(request):
-    try:
-        profile = request.user.student_profile
-    except:
-        profile = None
-    
+    profile = StudentProfile.objects.filter(user=request.user).first()
+
     return render(request, 'profile.html', {'profile': profile})
 
 def logout_view(request):